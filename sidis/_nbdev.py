@@ -2,13 +2,25 @@
 
 __all__ = ["index", "modules", "custom_doc_links", "git_url"]
 
-index = {"timer": "00_utils.ipynb",
+index = {"Timing": "00_utils.ipynb",
+         "Timer": "00_utils.ipynb",
+         "timer_report": "00_utils.ipynb",
+         "timer_reset": "00_utils.ipynb",
+         "timer": "00_utils.ipynb",
          "filesize": "00_utils.ipynb",
+         "detect_codec": "00_utils.ipynb",
          "save": "00_utils.ipynb",
          "load": "00_utils.ipynb",
+         "Writer": "00_utils.ipynb",
+         "reader": "00_utils.ipynb",
+         "save_many": "00_utils.ipynb",
+         "load_many": "00_utils.ipynb",
+         "stable_hash": "00_utils.ipynb",
+         "memoize": "00_utils.ipynb",
          "push": "00_utils.ipynb",
          "refresh": "00_utils.ipynb",
          "backup": "00_utils.ipynb",
+         "__getattr__": "00_utils.ipynb",
          "fig_params": "00_utils.ipynb",
          "force_aspect": "00_utils.ipynb",
          "matshow": "00_utils.ipynb",
@@ -18,17 +30,26 @@ index = {"timer": "00_utils.ipynb",
          "nonitr2itr": "01_conversion.ipynb",
          "itr2nonitr": "01_conversion.ipynb",
          "itr2itr": "01_conversion.ipynb",
+         "arr2nonitr": "01_conversion.ipynb",
+         "arr2itr": "01_conversion.ipynb",
          "Caster": "01_conversion.ipynb",
          "isiter": "01_conversion.ipynb",
          "cast": "01_conversion.ipynb",
          "typestr": "01_conversion.ipynb",
+         "BitArray": "01_conversion.ipynb",
          "pad": "01_conversion.ipynb",
+         "ragged": "01_conversion.ipynb",
          "fill": "01_conversion.ipynb",
+         "pads": "01_conversion.ipynb",
          "nbits": "01_conversion.ipynb",
          "num2ar": "01_conversion.ipynb",
          "ar2num": "01_conversion.ipynb",
+         "nums2ars": "01_conversion.ipynb",
+         "ars2nums": "01_conversion.ipynb",
          "ar2hex": "01_conversion.ipynb",
          "hex2ar": "01_conversion.ipynb",
+         "hexs2ars": "01_conversion.ipynb",
+         "ars2hexs": "01_conversion.ipynb",
          "str2ar": "01_conversion.ipynb",
          "ar2str": "01_conversion.ipynb",
          "COPY": "01_conversion.ipynb",
@@ -40,28 +61,57 @@ index = {"timer": "00_utils.ipynb",
          "ar2gr": "01_conversion.ipynb",
          "gr2ar": "01_conversion.ipynb",
          "num2gr": "01_conversion.ipynb",
+         "gr2num": "01_conversion.ipynb",
          "convert": "01_conversion.ipynb",
+         "convert_batch": "04_bench.ipynb",
          "rint": "01_conversion.ipynb",
          "depth": "02_recursion.ipynb",
+         "iflatten": "02_recursion.ipynb",
+         "iflatten_items": "02_recursion.ipynb",
          "flatten": "02_recursion.ipynb",
+         "unflatten_from_items": "02_recursion.ipynb",
          "unflatten": "02_recursion.ipynb",
+         "access": "02_recursion.ipynb",
+         "Path": "02_recursion.ipynb",
+         "compile_path": "02_recursion.ipynb",
          "get": "02_recursion.ipynb",
+         "assign": "02_recursion.ipynb",
          "give": "02_recursion.ipynb",
+         "argsort_keys": "02_recursion.ipynb",
          "sort": "02_recursion.ipynb",
+         "Pipeline": "02_recursion.ipynb",
          "pipe": "02_recursion.ipynb",
+         "imap": "02_recursion.ipynb",
          "maps": "02_recursion.ipynb",
          "replace": "03_templates.ipynb",
          "txt2lst": "03_templates.ipynb",
          "lst2txt": "03_templates.ipynb",
          "ZIP": "03_templates.ipynb",
+         "iZIP": "03_templates.ipynb",
          "getEvals": "03_templates.ipynb",
+         "CompiledTxt": "03_templates.ipynb",
+         "compile_txt": "03_templates.ipynb",
          "filltxt": "03_templates.ipynb",
-         "Template": "03_templates.ipynb"}
+         "Template": "03_templates.ipynb",
+         "benchmark": "04_bench.ipynb",
+         "measure": "04_bench.ipynb",
+         "cast_list": "04_bench.ipynb",
+         "convert_int": "04_bench.ipynb",
+         "flatten_list": "04_bench.ipynb",
+         "flatten_dict": "04_bench.ipynb",
+         "get_nested": "04_bench.ipynb",
+         "sort_numbers": "04_bench.ipynb",
+         "maps_funcs": "04_bench.ipynb",
+         "filltxt_lines": "04_bench.ipynb",
+         "run": "04_bench.ipynb",
+         "compare": "04_bench.ipynb",
+         "main": "04_bench.ipynb"}
 
 modules = ["utils.py",
            "conversion.py",
            "recursion.py",
-           "templates.py"]
+           "templates.py",
+           "bench.py"]
 
 doc_url = "https://Noeloikeau.github.io/sidis/"
 
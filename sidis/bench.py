@@ -0,0 +1,187 @@
+# AUTOGENERATED! DO NOT EDIT! File to edit: 04_bench.ipynb (unless otherwise specified).
+
+__all__ = ['benchmark', 'measure', 'run', 'compare', 'main']
+
+# Cell
+import warnings
+with warnings.catch_warnings(): #ignore warnings
+    warnings.simplefilter("ignore")
+    import sys
+    import gc
+    import json
+    import time
+    import timeit
+    import argparse
+    import platform
+    import itertools
+    import tracemalloc
+    import numpy as np
+    from typing import Optional, Tuple, Dict, Callable, Union, Mapping, Sequence, Iterable
+    from functools import partial
+    from .conversion import cast,convert
+    from .recursion import flatten,get,sort,maps
+    from .templates import filltxt
+
+# Cell
+_benchmarks={} #name : (setup, params)
+
+def benchmark(name : Optional[str] = None,
+              **params : Sequence) -> callable:
+    '''
+    Decorator registering `setup(**kwargs)`, which prepares inputs and returns the
+    zero-argument function to time, for every combination of the values in `params`.
+    '''
+    def register(setup):
+        _benchmarks[name or setup.__name__]=(setup,params)
+        return setup
+    return register
+
+def measure(func : callable,
+            repeat : int = 5,
+            number : Optional[int] = None,
+            warmup : int = 1,
+            memory : bool = True) -> dict:
+    '''
+    Times `func` like `timeit`: after `warmup` calls, `repeat` runs of `number` calls
+    (chosen by `timeit.Timer.autorange` if None) give the seconds per call.
+    If `memory`, also reports the peak bytes allocated by one call using `tracemalloc`.
+    '''
+    for _ in range(warmup):
+        func()
+    t=timeit.Timer(func)
+    number=number or t.autorange()[0]
+    times=[s/number for s in t.repeat(repeat,number)]
+    res={'number':number,'repeat':repeat,'best':min(times),
+         'median':float(np.median(times)),'mean':float(np.mean(times))}
+    if memory:
+        gc.collect()
+        tracemalloc.start()
+        func()
+        res['peak_bytes']=tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+    return res
+
+# Internal Cell
+def _nested(depth,width=2,leaf=0):
+    '''
+    Returns a nested dict `depth` layers deep with `width` keys per layer.
+    '''
+    return leaf if depth==0 else {f'k{i}':_nested(depth-1,width,leaf) for i in range(width)}
+
+def _nested_list(n,depth):
+    '''
+    Returns `n` numbers nested `depth` lists deep.
+    '''
+    x=list(range(n))
+    for _ in range(depth-1):
+        x=[x[i:i+2] for i in range(0,len(x),2)]
+    return x
+
+@benchmark(n=[10,1000,100000])
+def cast_list(n):
+    x=list(range(n))
+    return lambda: cast(x,np.ndarray)
+
+@benchmark(n=[10,1000])
+def convert_int(n):
+    return lambda: [convert(i) for i in range(n)]
+
+@benchmark(n=[10,1000,100000])
+def convert_batch(n):
+    x=np.arange(n)
+    return lambda: convert(x,list,batch=True)
+
+@benchmark(n=[1000,100000],depth=[1,4])
+def flatten_list(n,depth):
+    x=_nested_list(n,depth)
+    return lambda: flatten(x)
+
+@benchmark(depth=[2,8])
+def flatten_dict(depth):
+    x=_nested(depth)
+    return lambda: flatten(x)
+
+@benchmark(depth=[2,8])
+def get_nested(depth):
+    x=_nested(depth)
+    keys=['k1']*depth
+    return lambda: get(x,*keys)
+
+@benchmark(n=[1000,100000])
+def sort_numbers(n):
+    x=np.random.default_rng(0).integers(0,n,n).tolist()
+    return lambda: sort(x)
+
+@benchmark(n=[10,1000])
+def maps_funcs(n):
+    return lambda: maps(range(n),lambda t:t+1,lambda t:t*2,depth=1)
+
+@benchmark(n=[10,1000])
+def filltxt_lines(n):
+    txt='\n'.join(['value _x and _y', '{0} ZIP range(_n), lambda i:i']*n)
+    return lambda: filltxt(txt,_x=1,_y=2,_n=3)
+
+# Cell
+def run(names : Optional[Sequence[str]] = None,
+        quick : bool = False,
+        verbose : bool = False,
+        **kwargs) -> dict:
+    '''
+    Runs the registered benchmarks (or only those in `names`) over their parameter grid,
+    returning {'name[param=value,...]' : `measure` results}. If `quick`, only the first
+    value of each parameter is used. `kwargs` are passed to `measure`.
+    '''
+    results={}
+    for name,(setup,params) in _benchmarks.items():
+        if names and name not in names:
+            continue
+        grid=[v[:1] if quick else v for v in params.values()]
+        for values in itertools.product(*grid):
+            kw=dict(zip(params,values))
+            key=name+'['+','.join(f'{k}={v}' for k,v in kw.items())+']'
+            results[key]=measure(setup(**kw),**kwargs)
+            if verbose:
+                print(f"{key:36} {results[key]['best']*1e6:14.3f} us {results[key].get('peak_bytes',0)/1e3:12.1f} kB")
+    return results
+
+def compare(new : dict,
+            old : dict,
+            threshold : float = 0.1,
+            stat : str = 'best') -> dict:
+    '''
+    Returns {key : ratio} of the benchmarks in both `new` and `old` results (or saved runs)
+    whose `stat` slowed down by more than the fraction `threshold`.
+    '''
+    new,old=new.get('results',new),old.get('results',old)
+    ratios={k:new[k][stat]/old[k][stat] for k in new if k in old and old[k][stat]}
+    return {k:r for k,r in ratios.items() if r>1+threshold}
+
+def main(argv : Optional[Sequence[str]] = None) -> int:
+    '''
+    Command line entry point of `python -m sidis.bench`, returning 1 if a regression is found.
+    '''
+    p=argparse.ArgumentParser(prog='python -m sidis.bench',description='Micro-benchmarks of sidis.')
+    p.add_argument('names',nargs='*',help='benchmarks to run, defaults to all of '+', '.join(_benchmarks))
+    p.add_argument('--quick',action='store_true',help='only use the smallest parameters')
+    p.add_argument('--repeat',type=int,default=5)
+    p.add_argument('--warmup',type=int,default=1)
+    p.add_argument('--out',help='save the results to this JSON file')
+    p.add_argument('--baseline',help='compare against the results in this JSON file')
+    p.add_argument('--threshold',type=float,default=0.1,help='allowed fractional slowdown')
+    args=p.parse_args(argv)
+    results=run(args.names,quick=args.quick,verbose=True,repeat=args.repeat,warmup=args.warmup)
+    if args.out:
+        meta={'python':platform.python_version(),'numpy':np.__version__,
+              'platform':platform.platform(),'time':time.strftime('%Y-%m-%dT%H:%M:%S')}
+        with open(args.out,'w') as f:
+            json.dump({'meta':meta,'results':results},f,indent=1)
+    if args.baseline:
+        with open(args.baseline) as f:
+            slower=compare(results,json.load(f),args.threshold)
+        for k,r in slower.items():
+            print(f'REGRESSION {k}: {r:.2f}x slower')
+        return int(bool(slower))
+    return 0
+
+if __name__=='__main__' and '__file__' in globals(): #not when run in a notebook
+    sys.exit(main())
\ No newline at end of file
@@ -1,8 +1,9 @@
 # AUTOGENERATED! DO NOT EDIT! File to edit: 01_conversion.ipynb (unless otherwise specified).
 
-__all__ = ['data', 'trycast', 'nonitr2itr', 'itr2nonitr', 'itr2itr', 'Caster', 'isiter', 'cast', 'typestr', 'pad',
-           'fill', 'nbits', 'num2ar', 'ar2num', 'ar2hex', 'hex2ar', 'str2ar', 'ar2str', 'COPY', 'NOT', 'AND', 'OR',
-           'Exclusive_OR', 'XOR', 'ar2gr', 'gr2ar', 'num2gr', 'convert', 'rint']
+__all__ = ['data', 'trycast', 'nonitr2itr', 'itr2nonitr', 'itr2itr', 'arr2nonitr', 'arr2itr', 'Caster', 'isiter',
+           'cast', 'typestr', 'BitArray', 'pad', 'ragged', 'fill', 'pads', 'nbits', 'num2ar', 'ar2num', 'nums2ars',
+           'ars2nums', 'ar2hex', 'hex2ar', 'hexs2ars', 'ars2hexs', 'str2ar', 'ar2str', 'COPY', 'NOT', 'AND', 'OR',
+           'Exclusive_OR', 'XOR', 'ar2gr', 'gr2ar', 'num2gr', 'gr2num', 'convert', 'convert_batch', 'rint']
 
 # Cell
 import warnings
@@ -11,7 +12,9 @@ with warnings.catch_warnings(): #ignore warnings
     import typing
     import numpy as np
     from typing import Optional, Tuple, Dict, Callable, Union, Mapping, Sequence, Iterable, List
-    from functools import partial
+    from functools import partial, reduce
+    from itertools import chain
+    from collections import namedtuple
     import warnings
 
 # Cell
@@ -55,9 +58,10 @@ def itr2nonitr(obj : data, to : type) -> data:
     Treat each element of the iterable `obj` as the
     noniterable type `to`.
     '''
-    t=type(obj)
-    if t is dict:
+    if isinstance(obj,dict):
         return {k:trycast(v,to) for k,v in obj.items()}
+    elif to is int or to is float: #int(list) and float(list) always fail, keep the list
+        return [trycast(i,to) for i in obj]
     else:
         return trycast([trycast(i,to) for i in obj],to)
 
@@ -68,7 +72,7 @@ def itr2itr(obj : data, to : type) -> data:
     Treats dictionaries as their items rather than default keys,
     and treats np.ndarray as the callable np.array(obj).
     '''
-    if type(obj) is dict:
+    if isinstance(obj,dict):
         return trycast(obj.items(),to)
     elif to is dict:
         return {i:o for i,o in enumerate(obj)}
@@ -77,6 +81,28 @@ def itr2itr(obj : data, to : type) -> data:
     else:
         return trycast(obj,to)
 
+# Cell
+def arr2nonitr(obj : np.ndarray, to : type, copy : bool = True) -> np.ndarray:
+    '''
+    Treat each element of the array `obj` as the noniterable type `to`
+    using a single `astype`. If not `copy`, `obj` itself is returned
+    whenever its dtype already matches `to`.
+    '''
+    return obj.astype(to,copy=copy)
+
+def arr2itr(obj : np.ndarray, to : type, copy : bool = True) -> data:
+    '''
+    Treat the array `obj` as the iterable `to`.
+    Lists are built with `tolist`, and if not `copy`,
+    arrays are returned as is.
+    '''
+    if to is list:
+        return obj.tolist()
+    elif to is np.ndarray:
+        return np.array(obj) if copy else obj
+    else:
+        return itr2itr(obj,to)
+
 # Cell
 isiter = lambda t: hasattr(t,'__iter__')
 
@@ -89,6 +115,15 @@ class Caster:
     The values are partially evaluated functions on the inner type,
     which get called by a class object and evaluated on the outer type.
     The ruleset can be updated and changed as needed.
+
+    Arrays are casted with numpy: their elements with a single `astype`
+    for the `numerics` types, and into lists with `tolist`. If not `copy`,
+    arrays that already have the requested type are returned without copying.
+
+    Rules are resolved along the method resolution order of the object type,
+    so subclasses (e.g `bool`, `OrderedDict`) use the rules of their parents,
+    and numpy scalars use the rules of the `aliases` python types. Resolved
+    rules are cached per (type, to) pair; see `cache_info` and `cache_clear`.
     '''
     types=[None,int,float,list,tuple,str,dict,set,np.ndarray]
 
@@ -96,18 +131,31 @@ class Caster:
 
     iterables.remove(str) #want to wrap strings like numbers
 
+    aliases={type(None):None,np.integer:int,np.bool_:int}
+
+    CacheInfo=namedtuple('CacheInfo',['hits','misses','currsize'])
+
+    numerics=[int,float] #array elements casted by `astype`
+
     def get_rules(types=types,
                   iterables=iterables,
                   itr2itr=itr2itr,
                   nonitr2itr=nonitr2itr,
-                  itr2nonitr=itr2nonitr):
+                  itr2nonitr=itr2nonitr,
+                  arr2itr=arr2itr,
+                  arr2nonitr=arr2nonitr,
+                  copy=True):
 
         rules={t1:{t2:None for t2 in types} for t1 in types}
         noniterables=[t for t in types if t not in iterables]
         Caster.noniterables=noniterables
         for t1 in types:
             for t2 in types:
-                if t1 in noniterables and t2 in iterables:
+                if t1 is np.ndarray and t2 in Caster.numerics:
+                    rules[t1][t2]=partial(arr2nonitr,to=t2,copy=copy)
+                elif t1 is np.ndarray and t2 in iterables:
+                    rules[t1][t2]=partial(arr2itr,to=t2,copy=copy)
+                elif t1 in noniterables and t2 in iterables:
                     rules[t1][t2]=partial(nonitr2itr,to=t2)
                 elif t1 in iterables and t2 in noniterables:
                     rules[t1][t2]=partial(itr2nonitr,to=t2)
@@ -120,27 +168,92 @@ class Caster:
 
 
     def __init__(self,
-                 rules : Optional[dict] = None):
+                 rules : Optional[dict] = None,
+                 copy : bool = True):
         if rules is None:
-            rules=Caster.get_rules()
+            rules=Caster.get_rules(copy=copy)
         self.rules=rules
+        self.cache={}
+        self.hits=0
+        self.misses=0
 
     def __getitem__(self,item):
+        self.cache_clear() #the returned rules may be modified in place
         return self.rules[item]
 
+    def resolve(self,
+                t : type,
+                to : type) -> callable:
+        '''
+        Return the rule casting objects of type `t` to type `to`, using the first
+        type in the method resolution order of `t` that has one, else `trycast`.
+        '''
+        f=self.cache.get((t,to))
+        if f is not None:
+            self.hits+=1
+            return f
+        self.misses+=1
+        f=partial(trycast,to=to)
+        for s in getattr(t,'__mro__',(t,)):
+            rule=self.rules.get(Caster.aliases.get(s,s),{}).get(to)
+            if rule is not None:
+                f=rule
+                break
+        self.cache[(t,to)]=f
+        return f
+
+    def cache_info(self):
+        '''
+        Return the number of `hits` and `misses` of the rule cache, and its current size.
+        '''
+        return Caster.CacheInfo(self.hits,self.misses,len(self.cache))
+
+    def cache_clear(self):
+        '''
+        Empty the rule cache. Required after modifying `rules` directly.
+        '''
+        self.cache.clear()
+        self.hits=0
+        self.misses=0
 
     def __call__(self,
                  obj : data,
                  *args : type):
         res=obj
         for arg in args:
-            t=type(res)
+            f=self.resolve(type(res),arg)
             try:
-                res=self.rules[t][arg](res)
-            except:
+                res=f(res)
+            except Exception:
                 res=trycast(res,arg)
         return res
 
+    def compile(self,
+                *args : type) -> callable:
+        '''
+        Return a reusable function casting its input sequentially to the types `args`,
+        i.e `f=cast.compile(list,float)` gives `f(obj)==cast(obj,list,float)`,
+        including the `trycast` fallback when a rule fails.
+        '''
+        resolve=self.resolve
+        if len(args)==1:
+            to=args[0]
+            def chain(obj):
+                try:
+                    return resolve(type(obj),to)(obj)
+                except Exception:
+                    return trycast(obj,to)
+        else:
+            def chain(obj):
+                res=obj
+                for arg in args:
+                    try:
+                        res=resolve(type(res),arg)(res)
+                    except Exception:
+                        res=trycast(res,arg)
+                return res
+        return chain
+
 # Cell
 cast=Caster()
 
@@ -155,6 +268,207 @@ def typestr(x : data):
         s=type(x)
     return str(s).split('<')[-1].split('>')[0].split('class')[-1].split('\'')[1]
 
+# Cell
+def _shift(words : np.ndarray, s : int, nbytes : int) -> np.ndarray:
+    '''
+    Shifts the bits packed in uint8 `words` along the last axis right by `s` (left if negative),
+    returning `nbytes` words per row. Bits shifted past either end are dropped.
+    '''
+    w=words.astype(np.uint16)
+    q,r=divmod(abs(s),8)
+    n=w.shape[-1]
+    out=np.zeros(w.shape[:-1]+(max(n+q+1,nbytes),),np.uint16)
+    if s>=0:
+        out[...,q:q+n]|=w>>r
+        out[...,q+1:q+n+1]|=(w<<(8-r))&0xFF
+    else:
+        w=w[...,q:]
+        n=w.shape[-1]
+        out[...,:n]|=(w<<r)&0xFF
+        out[...,:max(n-1,0)]|=w[...,1:]>>(8-r)
+    return out[...,:nbytes].astype(np.uint8)
+
+class BitArray:
+    '''
+    Binary array with its bits packed into uint8 `words` along the last axis, as by `np.packbits`,
+    using one bit of memory per bit. A 2-d `BitArray` holds one binary array of `bits` per row.
+    Supports indexing, `pad`, gray-code, bitwise `&`,`|`,`^`,`~` and conversion to numbers and hex
+    directly on the packed words.
+    '''
+    def __init__(self, a : Union[list,np.ndarray] = (),
+                 bits : Optional[int] = None):
+        a=np.asarray(a)
+        if a.dtype.kind not in 'biu':
+            a=a.astype(np.uint8)
+        self.words=np.packbits(a,axis=-1)
+        self.bits=a.shape[-1]
+        if bits is not None and bits>self.bits:
+            self.words,self.bits=self.pad(bits).words,bits
+
+    @classmethod
+    def fromwords(cls, words : np.ndarray, bits : int):
+        '''
+        Wraps packed uint8 `words` holding `bits` per row without copying.
+        '''
+        b=cls.__new__(cls)
+        b.words=np.asarray(words,np.uint8)
+        b.bits=bits
+        return b
+
+    @classmethod
+    def fromnums(cls, x : Union[int,list,np.ndarray], bits : Optional[int] = None):
+        '''
+        Packs the non-negative numbers `x` directly into words, one row of `bits` per number.
+        '''
+        x=np.asarray(x)
+        if x.dtype.kind=='f':
+            x=x.astype(np.int64)
+        big=(x.dtype==object)
+        width=max([int(i).bit_length() for i in x.flat]+[1]) if big else max(int(x.max(initial=0)).bit_length(),1)
+        bits=max(bits or 0,width)
+        nbytes=-(-bits//8)
+        if bits<=64 and not big: #big-endian bytes of each 64-bit word
+            w=x.astype('>u8').view(np.uint8).reshape(x.shape+(8,))[...,8-nbytes:]
+        else:
+            buf=b''.join([int(i).to_bytes(nbytes,'big') for i in x.flat])
+            w=np.frombuffer(buf,np.uint8).reshape(x.shape+(nbytes,))
+        return cls.fromwords(_shift(w,-(-bits%8),nbytes),bits) #numbers are right-aligned, bits left-aligned
+
+    @classmethod
+    def fromhex(cls, h : Union[str,list,np.ndarray], bits : Optional[int] = None):
+        '''
+        Packs the hex strings `h`, with or without `0x` prefix, into words, one row of `bits` per string,
+        decoding all of them at once with `bytes.fromhex`. `bits` defaults to four per digit of the longest string.
+        '''
+        h=np.asarray(h)
+        hs=[s[2:] if s[:2] in ('0x','0X') else s for s in h.ravel().tolist()]
+        digits=max(max(map(len,hs),default=1),-(-(bits or 0)//4),1)
+        bits=bits or 4*digits
+        size=-(-digits//2)
+        w=np.frombuffer(bytes.fromhex(''.join([s.zfill(2*size) for s in hs])),np.uint8).reshape(h.shape+(size,))
+        nbytes=-(-bits//8)
+        return cls.fromwords(_shift(w[...,size-nbytes:],-(-bits%8),nbytes),bits)
+
+    @property
+    def shape(self) -> tuple:
+        return self.words.shape[:-1]+(self.bits,)
+
+    @property
+    def ndim(self) -> int:
+        return self.words.ndim
+
+    @property
+    def nbytes(self) -> int:
+        return self.words.nbytes
+
+    def __len__(self):
+        return self.shape[0]
+
+    def _mask(self, words : np.ndarray) -> np.ndarray:
+        '''
+        Zeroes the unused trailing bits of the last word in place.
+        '''
+        if self.bits%8:
+            words[...,-1]&=np.uint8((0xFF<<(-self.bits%8))&0xFF)
+        return words
+
+    def __getitem__(self, key):
+        key=key if isinstance(key,tuple) else (key,)
+        if len(key)<self.ndim: #select rows
+            return self.fromwords(self.words[key],self.bits)
+        w=self.words[key[:-1]]
+        i=np.arange(self.bits)[key[-1]]
+        b=(w[...,i>>3]>>(7-(i&7)))&1
+        return int(b) if np.ndim(b)==0 else BitArray(b)
+
+    def toarray(self, to : Union[int,float] = np.uint8) -> np.ndarray:
+        '''
+        Unpacks into a bit array of elements `to`.
+        '''
+        return np.unpackbits(self.words,axis=-1,count=self.bits).astype(to,copy=False)
+
+    def pad(self, bits : Optional[int] = None):
+        '''
+        Pads with zeros on the left, up to a length of `bits`.
+        '''
+        bits=max(bits or 0,self.bits)
+        return self.fromwords(_shift(self.words,bits-self.bits,-(-bits//8)),bits)
+
+    def tonum(self, to : Union[int,float] = int) -> Union[int,np.ndarray]:
+        '''
+        Converts each row into a decimal number.
+        Rows of more than 63 bits are returned as arbitrary precision python ints.
+        '''
+        nbytes=self.words.shape[-1]
+        w=_shift(self.words,-self.bits%8,nbytes) #right-align the numbers
+        if self.bits<=63:
+            buf=np.zeros(w.shape[:-1]+(8,),np.uint8)
+            buf[...,8-nbytes:]=w
+            x=buf.view('>u8')[...,0].astype(np.int64)
+        else:
+            x=np.array([int.from_bytes(r.tobytes(),'big') for r in w.reshape(-1,nbytes)],dtype=object)
+            x=x.reshape(w.shape[:-1])
+        return cast(int(x[()]) if self.ndim==1 else x,to)
+
+    def tohex(self, prefix : bool = True) -> Union[str,list]:
+        '''
+        Converts each row into a hex string of `ceil(bits/4)` digits.
+        '''
+        nbytes=max(self.words.shape[-1],1)
+        w=_shift(self.words,-self.bits%8,nbytes)
+        s=w.tobytes().hex() #all rows at once
+        step=2*nbytes
+        start=step-max(-(-self.bits//4),1)
+        p='0x' if prefix else ''
+        h=[p+s[i+start:i+step] for i in range(0,len(s),step)]
+        return h[0] if self.ndim==1 else np.array(h,dtype=object).reshape(w.shape[:-1]).tolist()
+
+    def gray(self):
+        '''
+        Converts to gray-code, XORing each bit with its predecessor.
+        '''
+        nbytes=self.words.shape[-1]
+        return self.fromwords(self._mask(self.words^_shift(self.words,1,nbytes)),self.bits)
+
+    def binary(self):
+        '''
+        Converts from gray-code back into binary, by a prefix XOR using a logarithmic number of shifts.
+        '''
+        nbytes=self.words.shape[-1]
+        w=self.words
+        shift=1
+        while shift<self.bits:
+            w=w^self._mask(_shift(w,shift,nbytes))
+            shift*=2
+        return self.fromwords(w,self.bits)
+
+    def _op(self, other, op):
+        other=other if isinstance(other,BitArray) else BitArray(other)
+        bits=max(self.bits,other.bits)
+        return self.fromwords(op(self.pad(bits).words,other.pad(bits).words),bits)
+
+    def __and__(self, other):
+        return self._op(other,np.bitwise_and)
+
+    def __or__(self, other):
+        return self._op(other,np.bitwise_or)
+
+    def __xor__(self, other):
+        return self._op(other,np.bitwise_xor)
+
+    __rand__,__ror__,__rxor__=__and__,__or__,__xor__
+
+    def __invert__(self):
+        return self.fromwords(self._mask(~self.words),self.bits)
+
+    def __eq__(self, other):
+        return isinstance(other,BitArray) and self.bits==other.bits and np.array_equal(self.words,other.words)
+
+    def __repr__(self):
+        s=[r.tobytes().decode() for r in (self.toarray()+ord('0')).reshape(int(np.prod(self.shape[:-1])),self.bits)]
+        s=s[0] if self.ndim==1 else np.array(s,dtype=object).reshape(self.shape[:-1]).tolist()
+        return f'BitArray({s!r})'
+
 # Cell
 def pad(data : Union[np.ndarray,list],
           bits : Optional[int] = None,
@@ -162,29 +476,82 @@ def pad(data : Union[np.ndarray,list],
     '''
     Pads an array with zeros, up to a length of `bits`.
     '''
-    if bits is None:
-        bits=0
-    else:
-        bits=bits-len(data)
-    x=[0 for i in range(bits)]+list(data)
-    x=np.array(x).astype(to)
+    if isinstance(data,BitArray):
+        return data.pad(bits)
+    data=np.asarray(data)
+    x=np.zeros(max(bits or 0,len(data)),to)
+    x[len(x)-len(data):]=data
     return x
 
 # Cell
-def fill(x : list,fillwith=np.NaN,mask=True):
+def ragged(x : list) -> Tuple[np.ndarray,np.ndarray]:
+    '''
+    Compact (CSR-style) representation of uneven nested lists `x`:
+    the concatenated `values` and the `offsets` of each row,
+    so that row `i` is `values[offsets[i]:offsets[i+1]]`.
+    '''
+    lengths=np.fromiter(map(len,x),int,len(x))
+    offsets=np.zeros(len(x)+1,int)
+    np.cumsum(lengths,out=offsets[1:])
+    if all(isinstance(xi,np.ndarray) for xi in x) and len(x):
+        values=np.concatenate(x)
+    else:
+        values=np.array(list(chain.from_iterable(x)))
+    return values,offsets
+
+def _scatter(offsets : np.ndarray, width : int, right : bool = False) -> Tuple[np.ndarray,np.ndarray]:
+    '''
+    Row and column of each value of a `ragged` array within rows of `width`,
+    aligned to the left or to the `right`.
+    '''
+    lengths=np.diff(offsets)
+    rows=np.repeat(np.arange(len(lengths)),lengths)
+    cols=np.arange(offsets[-1])-offsets[rows]
+    if right:
+        cols+=width-lengths[rows]
+    return rows,cols
+
+def fill(x : list,fillwith=np.NaN,mask=True,compact=False):
     '''
     Turn uneven nested lists `x` into arrays `y` substituting
     missing entries using `fillwith` and optionally masking.
-    '''
-    length = max(map(len, x))
-    y=np.array([xi+[fillwith]*(length-len(xi)) for xi in x])
+    The values are scattered into `y` in one pass from their `ragged`
+    representation, which is returned instead if `compact`.
+    '''
+    values,offsets=ragged(x)
+    if compact:
+        return values,offsets
+    lengths=np.diff(offsets)
+    length=lengths.max(initial=0)
+    padded=(lengths<length).any()
+    if padded:
+        try:
+            dtype=np.result_type(values,np.asarray(fillwith))
+        except TypeError: #e.g numbers filled with strings
+            dtype=object
+        y=np.full((len(lengths),length),fillwith,dtype)
+    else: #no entries are missing, keep the values' dtype
+        y=np.empty((len(lengths),length),values.dtype)
+    y[_scatter(offsets,length)]=values
     if mask:
-        if np.isfinite(fillwith):
-            y=np.ma.masked_equal(y,fillwith)
-        else:
-            y=np.ma.masked_invalid(y)
+        y=np.ma.masked_array(y,np.arange(length)>=lengths[:,None],fill_value=fillwith if padded else None)
     return y
 
+# Cell
+def pads(data : list,
+         bits : Optional[int] = None,
+         to : Union[int,float] = int,
+         packed : bool = False) -> np.ndarray:
+    '''
+    Batch version of `pad`: pads each array of `data` with zeros on the left, up to a common length of `bits`,
+    into a single pre-allocated 2-d array with one row per array. If `packed`, returns a `BitArray` instead.
+    '''
+    values,offsets=ragged(data)
+    bits=max(bits or 0,np.diff(offsets).max(initial=0))
+    x=np.zeros((len(offsets)-1,bits),to)
+    x[_scatter(offsets,bits,right=True)]=values
+    return BitArray(x) if packed else x
+
 # Cell
 def nbits(x : Union[int,float,list,np.ndarray]) -> int:
     '''
@@ -204,13 +571,11 @@ def num2ar(x: Union[int,float],
     '''
     Converts decimal number `x` to array `a` zero-padded with `bits`.
     '''
-    bits=bits or nbits(x) #if None, give default
-    form='0'+str(bits)+'b'
-    binary=format(int(x),form)
-    with warnings.catch_warnings(): #ignore numpy deprecation warning
-        warnings.simplefilter("ignore")
-        a=np.fromstring(binary,'u1')-ord('0')
-    return cast(a,to)
+    x=int(x)
+    bits=max(bits or 0,x.bit_length(),1) #never truncate the number
+    nbytes=-(-bits//8)
+    a=np.unpackbits(np.frombuffer(x.to_bytes(nbytes,'big'),np.uint8))[-bits:]
+    return cast(a.astype(int),to)
 
 # Cell
 def ar2num(a : Union[list,np.ndarray],
@@ -218,13 +583,60 @@ def ar2num(a : Union[list,np.ndarray],
     '''
     Converts array `a` to decimal number `x`.
     '''
-    temp=str()
-    a=np.array(a).astype(int)
-    for c in a:
-        temp+=str(c)
-    x=int(temp,2)
+    if isinstance(a,BitArray):
+        return a.tonum(to)
+    a=np.array(a).astype(np.uint8)
+    x=int.from_bytes(np.packbits(a).tobytes(),'big')>>(-len(a)%8) #packbits pads on the right
     return cast(x,to)
 
+# Cell
+def nums2ars(x : Union[list,np.ndarray],
+             bits : Optional[int] = None,
+             to : Union[int,float] = np.uint8,
+             packed : bool = False) -> np.ndarray:
+    '''
+    Converts an array of non-negative decimal numbers `x` into a bit array
+    of shape `x.shape+(bits,)`, i.e one zero-padded row of bits per number.
+    If `bits` is None, uses the number of bits of the largest element.
+    If `packed`, returns a `BitArray` instead.
+    '''
+    if packed:
+        return BitArray.fromnums(x,bits)
+    x=np.asarray(x)
+    if x.dtype.kind=='f':
+        x=x.astype(np.int64)
+    big=(x.dtype==object)
+    width=max([int(i).bit_length() for i in x.flat]+[1]) if big else max(int(x.max(initial=0)).bit_length(),1)
+    bits=max(bits or 0,width)
+    if bits<=64 and not big: #unpack the big-endian bytes of each 64-bit word
+        b=np.unpackbits(x.astype('>u8').view(np.uint8).reshape(x.shape+(8,)),axis=-1)
+        b=b[...,64-bits:] if bits<64 else b
+    else: #arbitrary precision ints
+        nbytes=-(-bits//8)
+        buf=b''.join([int(i).to_bytes(nbytes,'big') for i in x.flat])
+        b=np.unpackbits(np.frombuffer(buf,np.uint8).reshape(x.shape+(nbytes,)),axis=-1)[...,-bits:]
+    return b.astype(to,copy=False)
+
+def ars2nums(a : Union[list,np.ndarray],
+             to : Union[int,float] = int) -> np.ndarray:
+    '''
+    Converts a bit array `a`, with one number per row, into an array of decimal numbers.
+    Rows of more than 63 bits are returned as arbitrary precision python ints.
+    '''
+    if isinstance(a,BitArray):
+        return a.tonum(to)
+    a=np.asarray(a).astype(np.uint8,copy=False)
+    bits=a.shape[-1]
+    if bits<=63: #left-pad each row to a 64-bit word and pack
+        words=np.zeros(a.shape[:-1]+(64,),dtype=np.uint8)
+        words[...,64-bits:]=a
+        x=np.packbits(words,axis=-1).view('>u8')[...,0].astype(np.int64)
+        return x.astype(to,copy=False)
+    else:
+        rows=np.packbits(a.reshape(-1,bits),axis=-1)
+        x=np.array([int.from_bytes(r.tobytes(),'big')>>(-bits%8) for r in rows],dtype=object)
+        return x.reshape(a.shape[:-1]) if to is int else x.reshape(a.shape[:-1]).astype(to)
+
 # Cell
 def ar2hex(a : Union[list,np.ndarray],
             bits : Optional[int] = None,
@@ -236,8 +648,10 @@ def ar2hex(a : Union[list,np.ndarray],
     out:
         h (str) : hex conversion of a
     '''
+    if isinstance(a,BitArray):
+        return a.pad(bits).tohex(prefix)
     bits=bits or nbits(a)
-    form='0'+str(int(np.log2(bits)))+'x'
+    form='0'+str(-(-bits//4))+'x'
     h=format(ar2num(a),form)
     if prefix:
         h='0x'+h
@@ -254,6 +668,27 @@ def hex2ar(h : str,
     a=num2ar(x,bits,to)
     return a
 
+# Cell
+def hexs2ars(h : Union[str,list,np.ndarray],
+             bits : Optional[int] = None,
+             to : Union[int,float] = np.uint8,
+             packed : bool = False) -> np.ndarray:
+    '''
+    Converts hex strings `h` into a bit array of shape `h.shape+(bits,)`, one row per string,
+    using `bytes.fromhex` and `np.unpackbits` once for all strings. `bits` defaults to four per
+    digit of the longest string. If `packed`, returns a `BitArray` instead.
+    '''
+    b=BitArray.fromhex(h,bits)
+    return b if packed else b.toarray(to)
+
+def ars2hexs(a : Union[list,np.ndarray],
+             prefix : bool = True) -> list:
+    '''
+    Converts a bit array `a`, one number per row, into hex strings of `ceil(bits/4)` digits,
+    using `np.packbits` and `.hex()` once for all rows.
+    '''
+    return (a if isinstance(a,BitArray) else BitArray(a)).tohex(prefix)
+
 # Cell
 def str2ar(s : str,
             to : Union[list,np.ndarray] = np.ndarray) -> Union[list,np.ndarray]:
@@ -272,96 +707,200 @@ def ar2str(a : Union[list,np.ndarray], to : data = None) -> str:
     return s
 
 # Cell
-def COPY(x : Union[int,float]) -> Union[int,float]:
+def _bitwise(*args) -> bool:
     '''
-    Simply returns `x`.
+    Whether the gate inputs are integer, boolean or packed bit arrays, which are combined
+    with bitwise ufuncs, rather than fuzzy (float) values, which are combined arithmetically.
     '''
-    return x
+    return any(isinstance(a,(np.ndarray,np.generic,BitArray)) for a in args) and \
+           all(isinstance(a,BitArray) or np.asarray(a).dtype.kind in 'biu' for a in args)
+
+def _gate(ufunc : np.ufunc, x, y, out : Optional[np.ndarray] = None):
+    '''
+    Applies the bitwise `ufunc` to `x` and `y` into `out`, or on the packed words if either is a `BitArray`.
+    '''
+    if isinstance(x,BitArray) or isinstance(y,BitArray):
+        x,y=(x,y) if isinstance(x,BitArray) else (y,x)
+        return x._op(y,ufunc)
+    return ufunc(x,y,out=out)
+
+def _fuzzy(x, out : Optional[np.ndarray] = None):
+    '''
+    Returns the arithmetic gate result `x`, copied into `out` if given.
+    '''
+    if out is None:
+        return x
+    np.copyto(out,x)
+    return out
 
-def NOT(x : Union[int,float]) -> Union[int,float]:
+def COPY(x : Union[int,float],
+         out : Optional[np.ndarray] = None) -> Union[int,float]:
     '''
-    Return conjugate of `x`.
+    Simply returns `x`, or copies it into `out`.
     '''
-    return 1-x
+    return _fuzzy(x,out)
+
+def NOT(x : Union[int,float],
+        out : Optional[np.ndarray] = None) -> Union[int,float]:
+    '''
+    Return conjugate of `x`. Boolean arrays are negated with `np.logical_not`
+    and integer arrays of bits by XOR with 1, into `out` if given.
+    '''
+    if isinstance(x,BitArray):
+        return ~x
+    if _bitwise(x):
+        x=np.asarray(x)
+        return np.logical_not(x,out=out) if x.dtype.kind=='b' else np.bitwise_xor(x,1,out=out)
+    return _fuzzy(1-x,out)
 
 def AND(x : Union[int,float],
-        y : Union[int,float]) -> Union[int,float]:
+        y : Union[int,float],
+        out : Optional[np.ndarray] = None) -> Union[int,float]:
     '''
     Return logical AND of `x` and `y`.
+    Integer and boolean arrays use `np.bitwise_and`, into `out` if given.
     '''
-    return x*y
+    if _bitwise(x,y):
+        return _gate(np.bitwise_and,x,y,out)
+    return _fuzzy(x*y,out)
 
 def OR(x : Union[int,float],
-       y : Union[int,float]) -> Union[int,float]:
+       y : Union[int,float],
+       out : Optional[np.ndarray] = None) -> Union[int,float]:
     '''
     Return logical OR of `x` and `y`. See DeMorgan's Laws.
+    Integer and boolean arrays use `np.bitwise_or`, into `out` if given.
     '''
-    return x+y-x*y
+    if _bitwise(x,y):
+        return _gate(np.bitwise_or,x,y,out)
+    return _fuzzy(x+y-x*y,out)
 
 def Exclusive_OR(x : Union[int,float],
-                 y : Union[int,float]) -> Union[int,float]:
+                 y : Union[int,float],
+                 out : Optional[np.ndarray] = None) -> Union[int,float]:
     '''
     Return logical exclusive OR of `x` and `y`. See DeMorgan's Laws.
-    '''
-    return OR( AND( x , NOT(y) ) , AND ( NOT(x) , y) )
-
-def XOR(*args : Union[int,float,list,np.ndarray]) -> Union[int,float]:
-    '''
-    Arbitrary input XOR using recursiveness.
-    '''
+    Integer and boolean arrays use `np.bitwise_xor`, into `out` if given.
+    '''
+    if _bitwise(x,y):
+        return _gate(np.bitwise_xor,x,y,out)
+    return _fuzzy(OR( AND( x , NOT(y) ) , AND ( NOT(x) , y) ),out)
+
+def XOR(*args : Union[int,float,list,np.ndarray],
+        out : Optional[np.ndarray] = None,
+        axis : Optional[int] = None) -> Union[int,float]:
+    '''
+    Arbitrary input XOR. Integer and boolean arrays are reduced pairwise with `np.bitwise_xor`
+    in a single temporary array, copied into `out` at the end so that `out` may also be an input,
+    and a single stacked array is reduced along `axis` with `np.bitwise_xor.reduce`.
+    Fuzzy inputs are folded using recursiveness.
+    '''
+    if axis is not None:
+        a,=args
+        if _bitwise(a):
+            return np.bitwise_xor.reduce(a,axis=axis,out=out)
+        args=tuple(np.moveaxis(np.asarray(a),axis,0))
+    if len(args)>1 and _bitwise(*args):
+        x=_gate(np.bitwise_xor,args[0],args[1]) #a new array, which the rest are reduced into
+        for y in args[2:]:
+            inplace=isinstance(x,np.ndarray) and isinstance(y,np.ndarray) and \
+                    np.broadcast_shapes(x.shape,y.shape)==x.shape and np.result_type(x,y)==x.dtype
+            x=_gate(np.bitwise_xor,x,y,x if inplace else None)
+        return x if isinstance(x,BitArray) else _fuzzy(x,out)
     x=0
     for a in args:
         x=Exclusive_OR(x,a)
-    return x
+    return _fuzzy(x,out)
 
 # Cell
 def ar2gr(binary : Union[list,np.ndarray],
-             to : Union[list,np.ndarray] = np.ndarray) -> Union[list,np.ndarray]:
+             to : Union[list,np.ndarray] = np.ndarray,
+             axis : int = -1) -> Union[list,np.ndarray]:
     '''
     Converts an input binary array to graycode.
-    '''
-    binary = cast(binary,int)
-    gray = []
-    gray += [binary[0]]
-    for i in range(1,len(binary)):
-        gray += [XOR(binary[i - 1], binary[i])]
-    return cast(cast(gray,int),to)
+    Each bit is XORed with its predecessor along `axis`,
+    so a 2-d array is converted row by row.
+    '''
+    if isinstance(binary,BitArray):
+        return binary.gray()
+    binary=np.asarray(binary)
+    if binary.dtype.kind not in 'biu':
+        binary=binary.astype(int)
+    gray=binary.copy()
+    body=[slice(None)]*binary.ndim
+    head=[slice(None)]*binary.ndim
+    body[axis],head[axis]=slice(1,None),slice(None,-1)
+    np.bitwise_xor(binary[tuple(body)],binary[tuple(head)],out=gray[tuple(body)])
+    return gray if to is np.ndarray else cast(gray.tolist(),to)
 
 # Cell
 def gr2ar(gray : Union[list,np.ndarray],
-             to : Union[list,np.ndarray] = np.ndarray) -> Union[list,np.ndarray]:
+             to : Union[list,np.ndarray] = np.ndarray,
+             axis : int = -1) -> Union[list,np.ndarray]:
     '''
     Converts a gray-code array into binary.
+    Each bit is the cumulative XOR of the gray-code bits along `axis`.
     '''
-    binary = []
-    binary += [gray[0]]
-    for i in range(1, len(gray)):
-        if (gray[i] == 0):
-            binary += [binary[i - 1]]
-        else:
-            binary += [NOT(binary[i - 1])]
-    return cast(cast(binary,int),to)
-
+    if isinstance(gray,BitArray):
+        return gray.binary()
+    gray=np.asarray(gray)
+    if gray.dtype.kind not in 'biu':
+        gray=gray.astype(int)
+    binary=np.bitwise_xor.accumulate(gray,axis=axis)
+    return binary if to is np.ndarray else cast(binary.tolist(),to)
 
 # Cell
-def num2gr(x:int,to:data=None):
+def num2gr(x : Union[int,float,np.ndarray],
+           to : data = None) -> Union[int,np.ndarray]:
     '''
     Converts decimal number `x` to equivalent gray-code number.
+    Works on arbitrary precision ints and on arrays of numbers.
+    '''
+    if isinstance(x,float):
+        x=int(x)
+    elif isinstance(x,np.ndarray) and x.dtype.kind=='f':
+        x=x.astype(np.int64)
+    g=x^(x>>1)
+    return g if to is None else cast(g,to)
+
+def gr2num(g : Union[int,np.ndarray],
+           to : data = None) -> Union[int,np.ndarray]:
     '''
-    return int(ar2str(ar2gr(num2ar(x))),2)
+    Converts gray-code number `g` back into a decimal number by a prefix XOR
+    of its bits, using a logarithmic number of shifts.
+    Works on arbitrary precision ints and on arrays of numbers.
+    '''
+    x=g
+    if isinstance(g,np.ndarray) and g.dtype!=object:
+        width=8*g.dtype.itemsize
+    else:
+        width=max([int(i).bit_length() for i in np.asarray(g).flat]+[1])
+    shift=1
+    while shift<width:
+        x=x^(x>>shift)
+        shift*=2
+    return x if to is None else cast(x,to)
 
 # Cell
 def convert(obj : Union[int,float,list,hex,str,np.ndarray],
             to : Union[int,float,list,hex,str,np.ndarray] = np.ndarray,
             bits : Optional[int] = None,
             astype : Union[int,float,list,np.ndarray] = int,
-            gray : bool = False):
+            gray : bool = False,
+            batch : Optional[bool] = None):
     '''
     Converts an input `obj` into an output of type `to`, padding with `bits`.
     Internally converts `obj` to np.ndarray with elements of dtype `astype`,
     before converting to the desired dtype `to`. If `gray`, first converts this
     binary array to gray-code. If input or output are `hex`, requires prefix of `0x`.
 
+    If `batch`, the array `obj` is treated as a collection of numbers rather than
+    a single binary array, and converted at once using `nums2ars` and `ars2nums`.
+    If `batch` is None, this is inferred from the shape and dtype of `obj`, never its values:
+    arrays with more than one dimension are treated as one binary array per row, and 1-d arrays
+    of hex strings or of python ints (object dtype) as arrays of numbers. Other 1-d arrays are
+    single binary arrays, so 1-d numeric arrays of numbers need an explicit `batch=True`.
+
     Possible conversions:
         int -> float
         int -> str
@@ -396,6 +935,12 @@ def convert(obj : Union[int,float,list,hex,str,np.ndarray],
     '''
 
     t=type(obj)
+    if batch is None:
+        batch=(t is np.ndarray) and (obj.ndim>1 or obj.dtype.kind in 'OUS')
+    if batch:
+        return convert_batch(obj,to,bits,astype,gray)
+    if ((t is int) or (t is float)) and ((to is int) or (to is float) or (to is hex)):
+        return to(num2gr(int(obj)) if gray else int(obj)) #no need for the binary array
     #first convert to binary numpy array
     if (t is np.ndarray) or (t is list):
         x=obj
@@ -407,28 +952,56 @@ def convert(obj : Union[int,float,list,hex,str,np.ndarray],
         else:
             x=str2ar(obj)
     x=cast(pad(x,bits),astype)
-    g=cast(ar2gr(x),astype)
+    if gray:
+        x=cast(ar2gr(x),astype)
     #convert
     if (to is np.ndarray):
-        if gray:
-            return g
-        else:
-            return x
+        return x
     elif (to is list) or (to is set):
-        if gray:
-            return to(g)
-        else:
-            return to(x)
+        return cast(x,to)
     elif (to is int) or (to is float) or (to is hex):
-        if gray:
-            return to(ar2num(g))
-        else:
-            return to(ar2num(x))
+        return to(ar2num(x))
     else:# to is str
-        if gray:
-            return ar2str(g)
-        else:
-            return ar2str(x)
+        return ar2str(x)
+
+# Cell
+def convert_batch(obj : Union[list,np.ndarray],
+                  to : Union[int,float,list,hex,str,np.ndarray] = np.ndarray,
+                  bits : Optional[int] = None,
+                  astype : Union[int,float,list,np.ndarray] = int,
+                  gray : bool = False):
+    '''
+    Batch version of `convert`. A 1-d `obj` is treated as an array of numbers
+    (or of hex strings), and a 2-d `obj` as a bit array with one number per row. Returns a bit array
+    with one row per number if `to` is np.ndarray (packed if `BitArray`), else a list (or array for
+    `int` and `float`) of the converted numbers. Hex strings have `ceil(bits/4)` digits as in `ars2hexs`.
+    '''
+    obj=np.asarray(obj)
+    if obj.dtype.kind in 'US': #hex strings
+        obj=hexs2ars(obj,bits)
+    if obj.ndim<=1 and ((to is int) or (to is float)):
+        return (num2gr(obj) if gray else obj).astype(to) #no need for the binary array
+    if obj.ndim>1:
+        x=obj.astype(np.uint8)
+        if bits is not None and bits>x.shape[-1]: #left-pad the rows
+            x=np.concatenate([np.zeros(x.shape[:-1]+(bits-x.shape[-1],),np.uint8),x],axis=-1)
+    else:
+        x=nums2ars(obj,bits)
+    if gray:
+        x=ar2gr(x)
+    if (to is np.ndarray):
+        return x.astype(astype)
+    elif (to is BitArray):
+        return BitArray(x)
+    elif (to is int) or (to is float):
+        return ars2nums(x,to)
+    elif (to is hex):
+        return ars2hexs(x)
+    elif (to is str):
+        s=(x.astype(np.uint8)+ord('0')).reshape(-1,x.shape[-1])
+        return [i.decode() for i in np.ascontiguousarray(s).view(f'S{x.shape[-1]}')[:,0]]
+    else:
+        return [to(i) for i in x.astype(astype).tolist()]
 
 # Cell
 def rint(x: Union[int,float,list,np.ndarray]) -> Union[int,np.ndarray]:
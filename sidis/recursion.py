@@ -1,6 +1,7 @@
 # AUTOGENERATED! DO NOT EDIT! File to edit: 02_recursion.ipynb (unless otherwise specified).
 
-__all__ = ['depth', 'flatten', 'unflatten', 'get', 'give', 'sort', 'pipe', 'maps']
+__all__ = ['depth', 'iflatten', 'iflatten_items', 'flatten', 'unflatten_from_items', 'unflatten', 'access', 'Path',
+           'compile_path', 'get', 'assign', 'give', 'argsort_keys', 'sort', 'Pipeline', 'pipe', 'imap', 'maps']
 
 # Cell
 import warnings
@@ -10,6 +11,9 @@ with warnings.catch_warnings(): #ignore warnings
     import numpy as np
     from typing import Optional, Tuple, Dict, Callable, Union, Mapping, Sequence, Iterable
     from functools import partial
+    import operator
+    import itertools
+    from concurrent.futures import Executor, ThreadPoolExecutor, ProcessPoolExecutor
     import warnings
     from .conversion import cast,convert
     import collections
@@ -28,59 +32,239 @@ def depth(obj : Union[dict,list]):
 
 
 # Cell
-def flatten(obj : Union[dict,list], parent_key='',sep=','):
+def iflatten(obj : list):
+    '''
+    Lazily yield the elements of the nested list `obj` in order.
+    Uses a stack of iterators rather than recursion, so it runs in
+    linear time and handles lists of any depth and width.
+    '''
+    stack=[iter(obj)]
+    while stack:
+        for o in stack[-1]:
+            if isinstance(o,list):
+                stack.append(iter(o))
+                break
+            yield o
+        else:
+            stack.pop()
+
+# Cell
+def iflatten_items(obj : Mapping,
+                   parent_key : Union[str,tuple] = '',
+                   sep : str = ',',
+                   tuples : bool = False):
+    '''
+    Lazily yield the (key, value) pairs of the flattened nested dictionary `obj`
+    in a single depth-first pass. Keys are joined by `sep` after `parent_key`,
+    or if `tuples`, are the tuple of nested keys, which avoids joining strings.
+    '''
+    if tuples:
+        parent_key=tuple(parent_key) if isinstance(parent_key,tuple) else ((parent_key,) if parent_key else ())
+    stack=[(parent_key,iter(obj.items()))]
+    while stack:
+        key,items=stack[-1]
+        for k,v in items:
+            if tuples:
+                new_key=key+(k,)
+            else:
+                new_key=key+sep+str(k) if key else str(k)
+            if isinstance(v,collections.abc.MutableMapping):
+                stack.append((new_key,iter(v.items())))
+                break
+            yield new_key,v
+        else:
+            stack.pop()
+
+# Cell
+def flatten(obj : Union[dict,list], parent_key='',sep=',',asarray=False):
     '''
     Concatenate the nested input `obj` into an equivalent
     datastructure of depth 1. Uses the `parent_key` and `sep`
     arg to combine nested dictionary keys.
     https://stackoverflow.com/questions/6027558/flatten-nested-dictionaries-compressing-keys
 
+    Lists are flattened by `iflatten`, dicts by `iflatten_items`. If `asarray`, returns a flat
+    np.ndarray of the same elements instead, which numpy builds directly for rectangular lists
+    of numbers. Other elements, like strings mixed with numbers or tuples, are kept unchanged
+    in an object array as in the list result.
+
     '''
 
     def flatten_list(obj):
-        if obj == []:
-            return obj
-        if isinstance(obj[0], list):
-            return flatten_list(obj[0]) + flatten_list(obj[1:])
-        return obj[:1] + flatten_list(obj[1:])
+        if asarray:
+            levels=0 #numpy also reads tuples and arrays as levels, so these must only be lists
+            o=obj
+            while isinstance(o,list) and o:
+                o=o[0]
+                levels+=1
+            try: #rectangular lists of numbers
+                a=np.array(obj)
+                if a.dtype.kind in 'biufc' and a.ndim==levels:
+                    return a.ravel()
+            except ValueError:
+                pass
+            flat=list(iflatten(obj))
+            try:
+                a=np.array(flat)
+                if a.dtype.kind in 'biufc' and a.ndim==1:
+                    return a
+            except ValueError:
+                pass
+            return np.fromiter(flat,object,len(flat))
+        return list(iflatten(obj))
 
     def flatten_dict(obj=obj,parent_key=parent_key,sep=sep):
-        items = []
-        for k, v in obj.items():
-            new_key = parent_key + sep + str(k) if parent_key else str(k)
-            if isinstance(v, collections.abc.MutableMapping):
-                items.extend(flatten_dict(v, new_key, sep=sep).items())
-            else:
-                items.append((new_key, v))
-        return dict(items)
+        return dict(iflatten_items(obj,parent_key,sep))
 
     if type(obj) is dict:
             return flatten_dict(obj)
     elif type(obj) is list:
         return flatten_list(obj)
 
+# Cell
+def unflatten_from_items(items : Iterable[tuple],
+                         sep : str = ","):
+    '''
+    Build a nested dictionary from an iterable of (key, value) `items`,
+    such as those of `iflatten_items`, in a single pass. Keys are either
+    strings separated by `sep` or tuples of nested keys. The branch of
+    the previous key is reused for the shared prefix of the next one.
+    '''
+    root=dict()
+    path=[] #keys of the current branch
+    nodes=[root] #dicts along the current branch
+    for k,v in items:
+        keys=k if isinstance(k,tuple) else k.split(sep)
+        n=0
+        while n<len(path) and n<len(keys)-1 and path[n]==keys[n]:
+            n+=1
+        del path[n:]
+        del nodes[n+1:]
+        node=nodes[-1]
+        for ki in keys[n:-1]:
+            try:
+                node=node[ki]
+            except KeyError:
+                node[ki]=dict()
+                node=node[ki]
+            path.append(ki)
+            nodes.append(node)
+        node[keys[-1]]=v
+    return root
 
 # Cell
 def unflatten(d : dict, sep=","):
     '''
     Un-flatten a flattened nested dictionary `d` with
-    concatenated key separation `sep`.
+    concatenated key separation `sep`, or with tuple keys.
     https://gist.github.com/fmder/494aaa2dd6f8c428cede
     '''
-    items = dict()
-    for k, v in d.items():
-        keys = k.split(sep)
-        sub_items = items
-        for ki in keys[:-1]:
+    return unflatten_from_items(d.items(),sep)
+
+# Cell
+def _call(res,attr):
+    return res(attr)
+
+def _skip(res,attr):
+    return res
+
+_access=(operator.getitem,getattr,_call,_skip) #accessors tried in order by `access`
+
+_accessors={} #(type of res,type of attr) -> index of the first accessor to try, see `access`
+
+_typefails=(lambda res,attr: not hasattr(type(res),'__getitem__'), #whether each accessor in `_access`
+            lambda res,attr: not isinstance(attr,str), #fails for any `res` and `attr` of these types
+            lambda res,attr: not callable(res))
+
+def _first(res : object,
+           attr : Union[None,str,int,float,tuple,list,dict]) -> Tuple[int,object,bool]:
+    '''
+    Return the index in `_access` of the first accessor that works on `res` by `attr`, its result,
+    and whether the accessors before it can't work for any `res` and `attr` of these types
+    (see `_typefails`), rather than failing on their values (e.g a missing or unhashable key).
+    '''
+    learn=True
+    for i,f in enumerate(_access[:-1]):
+        try:
+            return i,f(res,attr),learn
+        except Exception:
+            learn=learn and _typefails[i](res,attr)
+    return len(_access)-1,res,learn #nothing works for these types
+
+def access(res : object,
+           attr : Union[None,str,int,float,tuple,list,dict]) -> object:
+    '''
+    Access `res` by `attr`, trying to index it, then to get its attribute,
+    then to call it, and returning `res` if none of these work.
+
+    The first accessor that works is remembered for the types of `res` and `attr`
+    when the ones before it can't work for any values of these types (e.g `res` has
+    no `__getitem__`), rather than failing on its value (e.g a missing key). `get` tries
+    remembered accessors first, so repeated access of same-shaped objects raises no exceptions.
+    '''
+    i,out,learn=_first(res,attr)
+    if learn and i:
+        _accessors[(type(res),type(attr))]=i
+    return out
+
+class Path:
+    '''
+    Reusable accessor of the ordered attributes/keys/indexes `args`, called on
+    an object like `get(obj,*args,retnone=retnone,call=call,**kwargs)`.
+    See `compile_path`.
+    '''
+    def __init__(self,
+                 *args : Union[None,str,int,float,tuple,list,dict],
+                 retnone : bool = True,
+                 call : bool = False,
+                 **kwargs):
+        self.args=args
+        self.retnone=retnone
+        self.call=call
+        self.kwargs=kwargs
+        self.steps=[None]*len(args) #(type,index in `_access`) that worked for each arg
+
+    def __call__(self,obj):
+        res=obj
+        for n,attr in enumerate(self.args):
+            step=self.steps[n]
+            if step is not None and step[0] is type(res):
+                try:
+                    res=_access[step[1]](res,attr)
+                    continue
+                except Exception:
+                    pass
+            t=type(res)
+            i,res,learn=_first(res,attr)
+            if learn:
+                self.steps[n]=(t,i)
+        if self.call:
             try:
-                sub_items = sub_items[ki]
-            except KeyError:
-                sub_items[ki] = dict()
-                sub_items = sub_items[ki]
+                res=res(**self.kwargs)
+            except:
+                res=res
+        if res is not obj:
+            return res
+        else:
+            return (None if self.retnone else obj)
 
-        sub_items[keys[-1]] = v
+    def __repr__(self):
+        return f"Path{self.args}"
 
-    return items
+def compile_path(obj_type : type,
+                 *args : Union[None,str,int,float,tuple,list,dict],
+                 retnone : bool = True,
+                 call : bool = False,
+                 **kwargs) -> Path:
+    '''
+    Return a `Path` accessing objects of type `obj_type` by `args`.
+    If `obj_type` can't be indexed, class attributes (e.g methods and properties)
+    named by the first arg are resolved ahead of the first call.
+    '''
+    path=Path(*args,retnone=retnone,call=call,**kwargs)
+    if args and not hasattr(obj_type,'__getitem__') and isinstance(args[0],str) and hasattr(obj_type,args[0]):
+        path.steps[0]=(obj_type,_access.index(getattr))
+    return path
 
 # Cell
 def get(obj : Union[object,dict,list,tuple,callable,np.ndarray],
@@ -96,19 +280,15 @@ def get(obj : Union[object,dict,list,tuple,callable,np.ndarray],
 
     If `retnone`, returns None if
     the object can't be accessed by any of the args; else, returns `obj`.
+
+    Each arg is accessed by `access`, which remembers what works for each type.
     '''
     res=obj
     for attr in args:
-        try: #list, arr, tuple w/index=attr, dict w/ key=attr
-            res=res[attr]
-        except:
-            try: #class object w/ attr
-                res=getattr(res,attr)
-            except: #method or callable
-                try:
-                    res=res(attr)
-                except:
-                    pass
+        try: #remembered accessor, else list, arr, tuple w/index=attr, dict w/ key=attr
+            res=_access[_accessors.get((type(res),type(attr)),0)](res,attr)
+        except: #class object w/ attr, method or callable
+            res=access(res,attr)
 
     if call:
         try:
@@ -122,6 +302,21 @@ def get(obj : Union[object,dict,list,tuple,callable,np.ndarray],
         return (None if retnone else obj)
 
 # Cell
+def assign(obj : object,
+           key : Union[str,int,float,tuple],
+           value : object):
+    '''
+    Assign `value` to the element `key` of `obj`, or else to its attribute `key`.
+    Types without item assignment go straight to `setattr`.
+    '''
+    if hasattr(type(obj),'__setitem__'):
+        try:
+            obj[key]=value
+            return
+        except Exception:
+            pass
+    setattr(obj,key,value)
+
 def give(obj : Union[object,dict,list,tuple,np.ndarray],
         *args : Union[str,int,float,tuple,list,dict],
          **kwargs : object
@@ -137,31 +332,22 @@ def give(obj : Union[object,dict,list,tuple,np.ndarray],
 
         elif len(args)==2: #index by first, set value of second
             try:
-                obj[args[0]]=args[1]
+                assign(obj,args[0],args[1])
             except:
-                try:
-                    setattr(obj,args[0],args[1])
-                except:
-                    print(f"Could not access up to {args[:-1]} and/or apply {args[-1]}.")
+                print(f"Could not access up to {args[:-1]} and/or apply {args[-1]}.")
 
         elif len(args)>2: #get up to -3, access by -2, set value with -1
             temp=get(obj,*args[:-2]) #need to access temporary variable
             try:
-                temp[args[-2]]=args[-1]
+                assign(temp,args[-2],args[-1])
             except:
-                try:
-                    setattr(temp,args[-2],args[-1])
-                except:
-                    print(f"Could not access up to {args[:-1]} and/or apply {args[-1]}.")
+                print(f"Could not access up to {args[:-1]} and/or apply {args[-1]}.")
 
     else: #dict or obj-like
         if len(args)==0: #set key,value pairs or attrs
             try:
                 for k,v in kwargs.items():
-                    try:
-                        obj[k]=v
-                    except:
-                        setattr(obj,k,v)
+                    assign(obj,k,v)
             except:
                 print(f"Could not access {k} and/or apply {v}.")
 
@@ -169,22 +355,58 @@ def give(obj : Union[object,dict,list,tuple,np.ndarray],
             try:
                 temp=get(obj,*args,retnone=False)
                 for k,v in kwargs.items():
-                    try:
-                        temp[k]=v
-                    except:
-                        setattr(temp,k,v)
+                    assign(temp,k,v)
             except:
                 print(f"Could not access {k} and/or apply {v}.")
 
+# Cell
+def argsort_keys(keys : Sequence,
+                 reverse : bool = False,
+                 top_k : Optional[int] = None
+                ) -> list:
+    '''
+    Returns the indexes which sort `keys` as `sorted` would (stably, honoring `reverse`),
+
+    truncated to the first `top_k` if given. Numeric keys (or equal-length tuples of numbers)
 
+    are ordered by `np.argsort`/`np.lexsort`, and `top_k` is found with `np.partition`
+
+    without sorting the rest; any other keys fall back to `sorted`.
+    '''
+    n=len(keys)
+    top_k=n if top_k is None else min(max(top_k,0),n)
+    try:
+        k=np.asarray(keys)
+        numeric=k.dtype.kind in 'biuf' and k.ndim in (1,2)
+    except (ValueError,TypeError):#ragged or incomparable keys
+        numeric=False
+    if not numeric:
+        return sorted(range(n),key=keys.__getitem__,reverse=reverse)[:top_k]
+
+    def stable(k):#reversing before and after a stable sort keeps ties in order
+        m=len(k)
+        if reverse: k=k[::-1]
+        idx=np.lexsort(k.T[::-1]) if k.ndim==2 else np.argsort(k,kind='stable')
+        return (m-1-idx)[::-1] if reverse else idx
+
+    if top_k==0:
+        return []
+    if top_k<n and k.ndim==1:#select the top_k, then sort only those
+        thr=np.partition(k,n-top_k)[n-top_k] if reverse else np.partition(k,top_k-1)[top_k-1]
+        best=np.flatnonzero(k>thr if reverse else k<thr)
+        ties=np.flatnonzero(k==thr)[:top_k-len(best)]
+        best=np.sort(np.concatenate([best,ties]))
+        return best[stable(k[best])].tolist()
+    return stable(k)[:top_k].tolist()
 
 # Cell
 def sort(obj : Iterable,
          *args : Union[None,str,int,float,tuple,list,dict],
          by : Union[None,object,dict,list,tuple,callable,np.ndarray] = None,#lambda o: o,
-         key : callable = lambda t: get(t,-1,retnone=False) if get(t,-1,retnone=False) else 0,#lambda t:t[-1] if depth(t)!=0 else t,
+         key : callable = lambda t: get(t,-1,retnone=False) or 0,#lambda t:t[-1] if depth(t)!=0 else t,
          sift : callable = lambda t: True,# if get(t,-1,retnone=False) else False,
-         reverse : bool = True
+         reverse : bool = True,
+         top_k : Optional[int] = None
         ) -> Union[None,int,float,list,tuple,str,dict,np.ndarray]:
     '''
     Recursively sorts `obj` `by` `args` using `key`.
@@ -203,63 +425,171 @@ def sort(obj : Iterable,
 
     `reverse` sorts ascending by default.
 
+    `key` is evaluated once per element (see `argsort_keys`), and `top_k`
+
+    returns only the first `top_k` sorted elements.
     '''
 
     if by is not None:#if you're sorting over a different evaluation than the object elements
 
-        sorting=filter(sift,[ (i, get( get( by, i, retnone=False), #evaluate inner function
-                        *args,retnone=False) #and any remaining args
-                  ) for i in obj]) #over iterable and store tuples then sort
+        sorting=[ (i, get( get( by, i, retnone=False), #evaluate inner function
+                        *args,retnone=False) if args else get(by,i,retnone=False) #and any remaining args
+                  ) for i in obj] #over iterable and store tuples then sort
 
-    elif args is not (): #if you're sorting over the object and provide args
+    elif args: #if you're sorting over the object and provide args
 
-        sorting=filter(sift,[get(get(obj,i,retnone=False),*args,retnone=False) for i in obj])
+        sorting=[get(get(obj,i,retnone=False),*args,retnone=False) for i in obj]
 
     else: #otherwise you're just sorting the object
 
-        sorting=filter(sift,obj)
+        sorting=obj
+
+    sorting=list(filter(sift,sorting))
+
+    return [sorting[i] for i in argsort_keys([key(t) for t in sorting],reverse=reverse,top_k=top_k)]
 
-    return sorted(sorting,key=key,reverse=reverse)
+# Cell
+class Pipeline:
+    '''
+    A chain of `pipe` stages (func,otype,ftype,cast,vectorized) applied in order.
+    Compose with `|` (plain callables become uncasted stages) or `then`.
+    A cast to the `otype` the previous stage already casted its output to
+    is dropped when the chain is built.
+    '''
+    def __init__(self,*stages):
+        self.stages=[]
+        for s in stages:
+            self.stages+=s.stages if isinstance(s,Pipeline) else [s if isinstance(s,tuple) else (s,None,None,None,False)]
+        self.steps=[] #stages, and whether to cast their input
+        prev=(None,)*5
+        for f,otype,ftype,c,vec in self.stages:
+            self.steps+=[(f,otype,ftype,c,vec,c is not None and not (c is prev[3] and otype is prev[2]))]
+            prev=(f,otype,ftype,c,vec)
+
+    def _step(self,step,obj,batch=False):
+        f,otype,ftype,c,vec,castin=step
+        if castin and not (batch and otype is None): #a batch is already casted as an array
+            obj=c(obj,otype)
+        obj=f(obj)
+        return obj if c is None else c(obj,ftype)
+
+    def __call__(self,obj):
+        for step in self.steps:
+            obj=self._step(step,obj)
+        return obj
 
+    def __or__(self,other):
+        return Pipeline(self,other)
+
+    def __ror__(self,other):
+        return Pipeline(other,self)
+
+    def __len__(self):
+        return len(self.stages)
+
+    def then(self,func,*args,**kwargs):
+        '''
+        Returns this pipeline followed by `pipe(func,*args,**kwargs)`.
+        '''
+        return self|pipe(func,*args,**kwargs)
+
+    def stream(self,obj,batch=None):
+        '''
+        Lazily yields the pipeline applied to each element of `obj`.
+        If `batch`, elements are gathered `batch` at a time and each `vectorized`
+        stage is applied once to the array of the batch (casted as an array),
+        while the other stages are still applied per element.
+        '''
+        if not batch:
+            yield from map(self,obj)
+            return
+        it=iter(obj)
+        chunk=list(itertools.islice(it,batch))
+        while chunk:
+            for step in self.steps:
+                if step[4]:
+                    chunk=self._step(step,np.asarray(chunk),batch=True)
+                else:
+                    chunk=[self._step(step,o) for o in chunk]
+            yield from chunk
+            chunk=list(itertools.islice(it,batch))
 
 # Cell
-def pipe(func,otype=None,ftype=None,cast=cast,*args,**kwargs):
+def pipe(func,otype=None,ftype=None,cast=cast,*args,vectorized=False,**kwargs):
     '''
     Pipelines the `func` to act on a later object.
     Returns a partially evaluated function over any `args` and `kwargs`.
     The object is casted to type `otype` before being evaluated.
     The output of the function is casted to `ftype`
+    The result is a single stage `Pipeline`, chained to others with `|` or `then`.
+    If `vectorized`, `func` may also be applied to a whole batch array at once.
     '''
-    f=partial(func,*args,**kwargs)
-    def line(obj):
-        obj=cast(obj,otype)
-        return cast(f(obj),ftype)
-    return line
-
+    return Pipeline((partial(func,*args,**kwargs),otype,ftype,cast,vectorized))
 
 # Cell
+def _mapone(o,funcs,depth=0):
+    '''
+    Applies the first `depth` `funcs` to `o` in sequence, then each remaining func separately.
+    '''
+    for f in funcs[:depth]:
+        o=get(f,o)
+    return [get(f,o) for f in funcs[depth:]]
+
+_executors={'thread':ThreadPoolExecutor,'process':ProcessPoolExecutor}
+
+def imap(func,obj,executor=None,workers=None,chunksize=1):
+    '''
+    Lazily maps `func` over `obj` in order, optionally sharded across an `executor`,
+    either 'thread', 'process', or an existing `concurrent.futures.Executor`.
+    A pool created here uses `workers` and is shut down once the results are consumed.
+    '''
+    if executor is None:
+        yield from map(func,obj)
+    elif isinstance(executor,Executor):
+        yield from executor.map(func,obj,chunksize=chunksize)
+    else:
+        with _executors[executor](workers) as pool:
+            yield from pool.map(func,obj,chunksize=chunksize)
+
 def maps(obj,
              *funcs,
              depth=0,
              zipit=False,
              to=None,
-             squeeze=True):
+             squeeze=True,
+             executor=None,
+             workers=None,
+             chunksize=1,
+             stream=False):
     '''
     Sequentially map `funcs` over the elements of `obj`, "o".
     The first `depth` number of funcs are mapped sequentially f(g(h(...(o)..)))=x.
     The remaining number of funcs are mapped separately (u(x),v(x),...).
     Use partial `funcs` to fill in all args but `obj` if other parameters needed.
     If `keys`, return tuples of the object elements "o" along with map outputs.
+    The elements are sharded across an `executor` ('thread' or 'process') of `workers`
+    in chunks of `chunksize`, see `imap`; 'process' requires picklable `funcs`.
+    If `stream`, lazily yields the (squeezed, zipped) result of each element in order instead.
     '''
     if not funcs:
         return obj
     else:
         obj=obj if hasattr(obj,'__iter__') and type(obj)!='str' else [obj] #asiter(obj)
-        r=[o for o in obj]
-        [[give(r,i,get(f,r[i])) for f in funcs[:depth]] for i in range(len(r))]
-        [give(r,i,[get(f,r[i]) for f in funcs[depth:]]) for i in range(len(r))]
+        obj,keys=itertools.tee(obj) if zipit else (obj,None)
+        r=imap(partial(_mapone,funcs=funcs,depth=depth),obj,executor,workers,chunksize)
+        if stream:
+            return _stream(r,keys,squeeze)
+        r=list(r)
         if squeeze:
             r=np.ndarray.tolist(np.squeeze(np.array(r,dtype=object)))
         if zipit:
-            r=list(zip(obj,r))
-        return cast(r,to)
\ No newline at end of file
+            r=list(zip(keys,r))
+        return cast(r,to)
+
+def _stream(r,keys=None,squeeze=True):
+    '''
+    Yields the results `r` of `maps` one at a time, squeezing each and pairing it with the next of `keys`.
+    '''
+    for x in r:
+        x=np.ndarray.tolist(np.squeeze(np.array(x,dtype=object))) if squeeze else x
+        yield x if keys is None else (next(keys),x)
\ No newline at end of file
@@ -1,6 +1,7 @@
 # AUTOGENERATED! DO NOT EDIT! File to edit: 03_templates.ipynb (unless otherwise specified).
 
-__all__ = ['replace', 'txt2lst', 'lst2txt', 'ZIP', 'getEvals', 'filltxt', 'Template']
+__all__ = ['replace', 'txt2lst', 'lst2txt', 'ZIP', 'iZIP', 'getEvals', 'CompiledTxt', 'compile_txt', 'filltxt',
+           'Template']
 
 # Cell
 import warnings
@@ -8,6 +9,9 @@ with warnings.catch_warnings(): #ignore warnings
     warnings.simplefilter("ignore")
     from typing import Optional, Tuple, Dict, Callable, Union, Mapping, Sequence, Iterable
     import numpy as np
+    import re
+    import collections.abc
+    from functools import lru_cache
     from .conversion import cast
     from .recursion import get
 
@@ -40,6 +44,25 @@ def ZIP(txt,_iter,*lambdas,as_txt=False):
         l=lst2txt(l)
     return l
 
+def iZIP(txt,_iter,*lambdas):
+    '''Lazy `ZIP`, yielding each formatted line in turn. Ranges, `np.ndindex` and other
+    iterators are consumed as they go rather than first cast to a list.
+    '''
+    _iter=_iter if isinstance(_iter,(range,collections.abc.Iterator)) else cast(_iter,list)
+    txt=str(txt)
+    star=True #unpack the elements into the lambdas until that fails
+    for i in _iter:
+        if star:
+            try:
+                line=txt.format( *[l(*i) for l in lambdas] )
+            except Exception:
+                star=False
+        if not star:
+            line=txt.format( *[l(i) for l in lambdas] )
+        yield line
+
+_lazy={'ZIP':iZIP} #generator versions of the `funcs`, used when streaming
+
 def getEvals(replaced_txt,funcs=['ZIP']):
     '''Obtain a tuple of containing the `funcs`, the text they format, their arguments,
     and their line index in the template `txt`.
@@ -52,24 +75,90 @@ def getEvals(replaced_txt,funcs=['ZIP']):
                 y+=[(f,o.split(f),i)]
     return y
 
+class CompiledTxt:
+    '''
+    A template `txt` parsed once for the replaceable `keys` and the `funcs` embedded in it.
+    Each non-empty line becomes either a format string with one slot per key occurance,
+    or a (func, text, args) block whose text and args are format strings. `render` then
+    substitutes all keys in a single pass and evaluates the blocks, see `filltxt`.
+    '''
+    def __init__(self,txt,keys=(),funcs=('ZIP',)):
+        self.keys,self.funcs=tuple(keys),tuple(funcs)
+        index={k:str(n) for n,k in enumerate(self.keys)}
+        tokens=sorted({t for t in self.keys+self.funcs if t},key=len,reverse=True) #longest match first
+        split=re.compile('('+'|'.join(map(re.escape,tokens))+')').split if tokens else lambda l:[l]
+        esc=lambda p:p.replace('{','{{').replace('}','}}')
+        self.lines=[]
+        for l in txt2lst(txt):
+            parts=[''] #format strings of the line, or of the text before the first func and its args
+            func=None
+            for n,p in enumerate(split(l)):
+                if n%2==0: #literal text
+                    parts[-1]+=esc(p)
+                elif func is None and p in self.funcs:
+                    func=p
+                    parts+=['']
+                elif p==func: #a second occurance ends the args
+                    parts+=['']
+                elif p in index:
+                    parts[-1]+='{'+index[p]+'}'
+                else:
+                    parts[-1]+=esc(p)
+            self.lines+=[parts[0] if func is None else (func,parts[0],parts[1])]
+
+    def render(self,**kwargs) -> list:
+        '''
+        Returns the list of lines filled with `kwargs`, evaluating the `funcs`.
+        '''
+        vals=[str(kwargs[k]) for k in self.keys]
+        env=dict(globals())
+        t=[]
+        for l in self.lines:
+            if type(l) is str:
+                t+=[l.format(*vals)]
+            else:
+                func,txt,args=l
+                env['_txt']=txt.format(*vals)
+                t+=eval(_expr(func,args.format(*vals)),env)
+        return t
+
+    def iter_render(self,**kwargs):
+        '''
+        Lazily yields the lines of `render`, expanding blocks with the generators in `_lazy`.
+        '''
+        vals=[str(kwargs[k]) for k in self.keys]
+        env=dict(globals())
+        env.update({f:g for f,g in _lazy.items() if f in self.funcs})
+        for l in self.lines:
+            if type(l) is str:
+                yield l.format(*vals)
+            else:
+                func,txt,args=l
+                env['_txt']=txt.format(*vals)
+                yield from eval(_expr(func,args.format(*vals)),env)
+
+@lru_cache(maxsize=4096)
+def _expr(func,args):
+    '''
+    Compiles the call of `func` on the text `_txt` and the source `args`.
+    '''
+    return compile(f'{func}(_txt,{args})','<template>','eval')
+
+@lru_cache(maxsize=128)
+def compile_txt(txt : str,
+                keys : tuple = (),
+                funcs : tuple = ('ZIP',)) -> CompiledTxt:
+    '''
+    Returns the `CompiledTxt` of `txt` for `keys` and `funcs`, cached for repeated renders.
+    '''
+    return CompiledTxt(txt,keys,funcs)
+
 def filltxt(txt,funcs=['ZIP'],**kwargs):
     '''Take a template `txt`, replace all `kwargs` via `Replace`, then evaluate the `funcs`
-       on the surrounding text using `GetEvals`.'''
-    txt=txt2lst(txt)
-    for i,l in enumerate(txt):
-        txt[i]=replace(l,**kwargs)
-    y=getEvals(txt,funcs)
-    e=list(map(lambda s: eval(s[0]+'('+'{0:s[1][0]}[0]'+','+s[1][1]+')' ),y)) #evaluate the function
-    u=[(i,e) for i,e in zip([y[i][-1] for i in range(len(y))],[e[i] for i in range(len(y))])] #position/evals
-    t=[] #new txt
-    for i in range(len(txt)):
-        t+=[txt[i]]
-        for j,e in u: #remove old lines
-            if i==j:
-                t.remove(txt[i])
-                for q in e:
-                    t+=[q]
-    return t
+       on the surrounding text using `GetEvals`.
+       The template is parsed once per set of keys by `compile_txt`, and each key is
+       replaced in a single pass (longest first, without rescanning substituted values).'''
+    return compile_txt(txt,tuple(kwargs),tuple(funcs)).render(**kwargs)
 
 
 class Template:
@@ -105,6 +194,10 @@ class Template:
 
         `fill`: fills the template by replacing `kwargs` and evaluating `funcs`.
 
+        `iter_lines`: lazily yields the filled lines, without storing them.
+
+        `render_to`: streams the filled lines to `fname`.
+
     '''
     funcs=['ZIP']
     filler=filltxt
@@ -125,16 +218,35 @@ class Template:
             if kwargs!={}:
                 self.plate=Template.filler(self.temp,Template.funcs,**kwargs)
                 self.__dict__.update(kwargs)
+                self.fills=[(self.temp,kwargs)]
         else:
             if (temp is not None) and (temp!=self.temp):
                 self.temp+='\n'+temp
             if kwargs!={}:
                 self.plate+=Template.filler(temp,Template.funcs,**kwargs)
                 self.__dict__.update(kwargs)
+                self.fills+=[(temp,kwargs)]
 
     def txt(self):
         return lst2txt(self.plate)
 
+    def iter_lines(self,**kwargs):
+        '''
+        Lazily yields the lines of `temp` filled with `kwargs`, or if None, of every previous `fill`.
+        `ZIP` blocks are expanded one line at a time, so nothing is stored.
+        '''
+        for temp,kw in ([(self.temp,kwargs)] if kwargs else getattr(self,'fills',[(self.temp,{})])):
+            yield from compile_txt(temp,tuple(kw),tuple(Template.funcs)).iter_render(**kw)
+
+    def render_to(self,fname,s='w',buffering=2**20,**kwargs):
+        '''
+        Writes the lines of `iter_lines(**kwargs)` to `fname` as they are generated,
+        through a write buffer of `buffering` bytes.
+        '''
+        with open(fname,s,buffering=buffering) as f:
+            for n,l in enumerate(self.iter_lines(**kwargs)):
+                f.write('\n'+l if n else l)
+
     def load(self,fname,**kwargs):
         with open(fname,'r') as f:
             self.temp=f.read()
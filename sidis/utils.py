@@ -1,7 +1,8 @@
 # AUTOGENERATED! DO NOT EDIT! File to edit: 00_utils.ipynb (unless otherwise specified).
 
-__all__ = ['timer', 'filesize', 'save', 'load', 'push', 'refresh', 'backup', 'fig_params', 'force_aspect', 'matshow',
-           'RNG']
+__all__ = ['Timing', 'Timer', 'timer_report', 'timer_reset', 'timer', 'filesize', 'detect_codec', 'save', 'load',
+           'Writer', 'reader', 'save_many', 'load_many', 'stable_hash', 'memoize', 'push', 'refresh', 'backup',
+           'fig_params', 'force_aspect', 'matshow', 'RNG']
 
 # Cell
 import warnings
@@ -10,68 +11,576 @@ with warnings.catch_warnings(): #ignore warnings
     import time
     import gzip
     import pickle
+    import lzma
+    import bz2
     import os
+    import sys
+    import types
+    import shutil
+    import glob
+    import hashlib
+    import csv
+    import copy
+    import importlib
+    import importlib.util
+    import collections
     import functools
     from functools import wraps
-    import matplotlib.pyplot as plt
-    import matplotlib as mpl
+    from concurrent.futures import Executor, ThreadPoolExecutor, ProcessPoolExecutor, as_completed
     import numpy as np
     import typing
     from typing import Optional, Tuple, Dict, Callable, Union, Mapping, Sequence, Iterable, List
+    from .recursion import iflatten_items
 
 # Cell
-def timer(func : callable) -> str:
+_timings={} #name : Timing, see `timer_report`
+
+class Timing:
+    '''
+    Accumulated timings of one function or block: the number of `calls`, and the
+    `count`, `total`, `min` and `max` nanoseconds of those timed, keeping the
+    last `maxsamples` times for percentiles.
+    '''
+    def __init__(self,maxsamples=10000):
+        self.calls=0
+        self.count=0
+        self.total=0
+        self.min=None
+        self.max=None
+        self.samples=collections.deque(maxlen=maxsamples)
+
+    def add(self,ns : int):
+        self.count+=1
+        self.total+=ns
+        self.min=ns if self.min is None else min(self.min,ns)
+        self.max=ns if self.max is None else max(self.max,ns)
+        self.samples.append(ns)
+
+    def stats(self,percentiles : Sequence = (50,90,99)) -> dict:
+        '''
+        Returns the calls, count and statistics in seconds as a dict.
+        '''
+        s={'calls':self.calls,'count':self.count,'total':self.total/1e9,
+           'mean':self.total/self.count/1e9 if self.count else None,
+           'min':self.min/1e9 if self.count else None,'max':self.max/1e9 if self.count else None}
+        for p in percentiles:
+            s[f'p{p}']=float(np.percentile(self.samples,p))/1e9 if self.count else None
+        return s
+
+try:
+    _perf_counter_ns=time.perf_counter_ns
+except AttributeError: #python<3.7
+    def _perf_counter_ns():
+        return int(time.perf_counter()*1e9)
+
+class Timer:
+    '''
+    Times calls of a decorated function, or a `with` block, as `name` in the registry of `timer_report`,
+    using `time.perf_counter_ns` where available. Only one in every `sample` calls is timed.
+    Prints each time unless `silent`. Without a `name`, functions are timed by their own name
+    and blocks as 'block'.
+    '''
+    def __init__(self,name=None,silent=False,sample=1):
+        self.name,self.silent,self.sample=name,silent,sample
+        self.starts=[]
+
+    def timing(self,name):
+        try:
+            return _timings[name]
+        except KeyError:
+            return _timings.setdefault(name,Timing())
+
+    def record(self,name,ns):
+        self.timing(name).add(ns)
+        if not self.silent:
+            print(name+' : '+f"Elapsed time: {ns/1e9:0.4f} seconds")
+
+    def __call__(self,func):
+        name=self.name or func.__name__
+        @wraps(func)
+        def wrapper(*args, return_time = False, **kwargs):
+            timing=self.timing(name)
+            timing.calls+=1
+            if (timing.calls-1)%self.sample and not return_time:
+                return func(*args, **kwargs)
+            start = _perf_counter_ns()
+            result = func(*args, **kwargs)
+            ns = _perf_counter_ns()-start
+            self.record(name,ns)
+            if not return_time:
+                return result
+            else:
+                if result is not None:
+                    return result,ns/1e9
+                else:
+                    return ns/1e9
+        return wrapper
+
+    def __enter__(self):
+        timing=self.timing(self.name or 'block')
+        timing.calls+=1
+        self.starts.append(None if (timing.calls-1)%self.sample else _perf_counter_ns())
+        return self
+
+    def __exit__(self,*exc):
+        start=self.starts.pop()
+        if start is not None:
+            self.record(self.name or 'block',_perf_counter_ns()-start)
+
+def timer_report(fname : Optional[str] = None,
+                 percentiles : Sequence = (50,90,99)) -> dict:
+    '''
+    Returns {name : statistics} of everything timed by `timer`, sorted by total time,
+    also writing them as CSV to `fname` if given.
+    '''
+    report={k:v.stats(percentiles) for k,v in sorted(_timings.items(),key=lambda kv:-kv[1].total)}
+    if fname is not None:
+        with open(fname,'w',newline='') as f:
+            w=csv.writer(f)
+            w.writerow(['name',*Timing().stats(percentiles)])
+            for k,v in report.items():
+                w.writerow([k,*v.values()])
+    return report
+
+def timer_reset(name : Optional[str] = None):
+    '''
+    Clears the timings of `name`, or of everything if None.
+    '''
+    if name is None:
+        _timings.clear()
+    else:
+        _timings.pop(name,None)
+
+# Cell
+def timer(func : Optional[callable] = None,
+          name : Optional[str] = None,
+          silent : bool = False,
+          sample : int = 1) -> str:
     '''Decorator that reports the execution time
     and optionally returns the time difference by
     adding a `return_time` Boolean keyword argument
-    to the function being wrapped.'''
-    @wraps(func)
-    def wrapper(*args, return_time = False, **kwargs):
-        start = time.time()
-        result = func(*args, **kwargs)
-        end = time.time()
-        t = end-start
-        print(func.__name__+' : '+f"Elapsed time: {t:0.4f} seconds")
-        if not return_time:
-            return result
-        else:
-            if result is not None:
-                return result,t
-            else:
-                return t
-    return wrapper
+    to the function being wrapped.
+    Each time is also accumulated in the registry of `timer_report`.
+    Called without a function, as `timer(name,silent,sample)`, returns a `Timer`
+    usable as a decorator or a context manager, which can be `silent` and only time
+    one in every `sample` calls.'''
+    if callable(func):
+        return Timer(name,silent,sample)(func)
+    return Timer(func if name is None else name,silent,sample)
 
 # Cell
+def _nbytes(fname):
+    '''
+    Returns the size of file `fname` in bytes, or the total of its files if a directory.
+    '''
+    if os.path.isdir(fname):
+        return sum(os.stat(os.path.join(fname,f)).st_size for f in os.listdir(fname))
+    return os.stat(fname).st_size
+
 def filesize(fname : str ='data.gz',
              exp : int = 1e-6):
     '''
     Returns filesize in bytes*`exp`, which defaults to megabytes.
+    The size of a directory is the total of its files.
     '''
     prefix={1:'', 1e-3:'kilo', 1e-6:'mega', 1e-9:'giga'}
-    size=float((os.stat(fname).st_size)*(exp if exp in prefix else 1))
+    size=float(_nbytes(fname)*(exp if exp in prefix else 1))
     return f"{fname} is {size:.5} {prefix.get(exp) or ''}bytes"
 
 # Cell
-def save(data,fname='data.gz'):
+_codecs={ #name : (magic header, opener(fname,mode,level))
+    'gzip':(b'\x1f\x8b',lambda fname,mode,level: gzip.open(fname,mode,compresslevel=9 if level is None else level)),
+    'lzma':(b'\xfd7zXZ\x00',lambda fname,mode,level: lzma.open(fname,mode,preset=level) if 'w' in mode else lzma.open(fname,mode)),
+    'bz2':(b'BZh',lambda fname,mode,level: bz2.open(fname,mode,compresslevel=9 if level is None else level))}
+if importlib.util.find_spec('lz4') is not None: #optional codecs, imported when first used
+    _codecs['lz4']=(b'\x04"M\x18',lambda fname,mode,level: importlib.import_module('lz4.frame').open(
+                                         fname,mode,compression_level=level or 0))
+if importlib.util.find_spec('zstandard') is not None:
+    _codecs['zstd']=(b'(\xb5/\xfd',lambda fname,mode,level: importlib.import_module('zstandard').open(fname,mode,
+                                         cctx=importlib.import_module('zstandard').ZstdCompressor(level=3 if level is None else level)))
+_codecs['pickle']=(b'\x80',lambda fname,mode,level: open(fname,mode))
+
+def detect_codec(fname : str = 'data.gz') -> Optional[str]:
+    '''
+    Returns the name of the codec `fname` was saved with, read from its first bytes.
+    '''
+    with open(fname,'rb') as f:
+        head=f.read(8)
+    for codec,(magic,_) in _codecs.items():
+        if head.startswith(magic):
+            return codec
+
+class _OOB:
+    '''
+    Header of the sizes of the pickle and out-of-band buffers written next by `_dump`.
+    A private class, so that no user data can be mistaken for it.
+    '''
+    def __init__(self,n,sizes):
+        self.n,self.sizes=n,sizes
+
+def _dump(data,f,oob=False):
+    '''
+    Pickles `data` into file `f`, with any contiguous arrays written from their own memory if `oob`.
+    '''
+    if not oob:
+        return pickle.dump(data,f,-1)
+    bufs=[]
+    main=pickle.dumps(data,5,buffer_callback=bufs.append)
+    bufs=[b.raw() for b in bufs]
+    pickle.dump(_OOB(len(main),[b.nbytes for b in bufs]),f,5)
+    f.write(main)
+    for b in bufs:
+        f.write(b)
+
+def _readinto(f,b):
+    m=memoryview(b)
+    n=0
+    while n<len(m):
+        r=f.readinto(m[n:])
+        if not r:
+            break
+        n+=r
+    return b
+
+def _load(f):
+    '''
+    Unpickles the next object written by `_dump` from file `f`.
+    '''
+    data=pickle.load(f)
+    if isinstance(data,_OOB):
+        main=_readinto(f,bytearray(data.n))
+        data=pickle.loads(main,buffers=[_readinto(f,bytearray(s)) for s in data.sizes])
+    return data
+
+# Cell
+def _split_arrays(data):
+    '''
+    Returns a copy of `data` without its ndarray leaves, and the leaves as {key path : array},
+    where key paths are the tuples of nested keys given by `iflatten_items`.
+    '''
+    if isinstance(data,np.ndarray) and not data.dtype.hasobject:
+        return None,{():data}
+    if not isinstance(data,collections.abc.MutableMapping):
+        return data,{}
+    arrays={k:v for k,v in iflatten_items(data,tuples=True) if isinstance(v,np.ndarray) and not v.dtype.hasobject}
+    rest=copy.copy(data)
+    copied={():rest}
+    for path in arrays: #copy only the branches holding arrays
+        node=rest
+        for n in range(1,len(path)):
+            if path[:n] not in copied:
+                node[path[n-1]]=copied[path[:n]]=copy.copy(node[path[n-1]])
+            node=node[path[n-1]]
+        del node[path[-1]]
+    return rest,arrays
+
+def _save_container(data,fname,codec='gzip',level=None,oob=False):
+    '''
+    Saves the arrays of `data` as uncompressed .npy files in directory `fname`,
+    named by their flattened key paths, and pickles the remainder with `codec`.
+    The directory is written under a temporary name and then replaces any previous `fname`.
+    '''
+    final,fname=fname,f"{fname.rstrip(os.sep)}.{os.getpid()}.tmp"
+    os.makedirs(fname)
+    rest,arrays=_split_arrays(data)
+    index={}
+    for path,a in arrays.items():
+        name=','.join(map(str,path)).replace(os.sep,'_') or 'data'
+        while name+'.npy' in index.values():
+            name+='_'
+        index[path]=name+'.npy'
+        np.save(os.path.join(fname,index[path]),a)
+    with _codecs[codec][1](os.path.join(fname,'rest'),'wb',level) as f:
+        _dump((rest,index),f,oob)
+    if os.path.isdir(final): #swap out the previous save, then delete it
+        os.replace(final,fname+'.old')
+        os.replace(fname,final)
+        shutil.rmtree(fname+'.old')
+    else:
+        os.replace(fname,final)
+
+def _load_container(fname,mmap=False):
+    '''
+    Loads a directory written by `_save_container`, memory-mapping the arrays if `mmap`.
+    '''
+    rest=os.path.join(fname,'rest')
+    with _codecs[detect_codec(rest)][1](rest,'rb',None) as f:
+        data,index=_load(f)
+    for path,name in index.items():
+        a=np.load(os.path.join(fname,name),mmap_mode=('r' if mmap is True else mmap) if mmap else None)
+        if not path:
+            data=a
+            continue
+        node=data
+        for k in path[:-1]:
+            node=node[k]
+        node[path[-1]]=a
+    return data
+
+# Cell
+def save(data,fname='data.gz',codec='gzip',level=None,oob=False,container=False,verbose=True):
     '''
     Saves `data` as `fname` using gzip and pickle.
     Maximizes speed and compression of objects.
+    Other `codec`s are 'pickle' (uncompressed), 'lzma', 'bz2', and 'lz4' or 'zstd'
+    when installed, compressing at `level` (lower is faster). If `oob`, contiguous
+    arrays are written as out-of-band pickle 5 buffers directly from their memory.
+    If `container`, `fname` is a directory holding each array of (nested dict) `data`
+    as an uncompressed .npy file, named by its key path, which `load` can memory-map.
+    If `verbose`, prints the resulting `filesize`.
     '''
-    with gzip.open(fname, "wb") as f:
-        pickle.dump(data,f,-1)
-    print(filesize(fname))
+    if container:
+        _save_container(data,fname,codec,level,oob)
+    else:
+        with _codecs[codec][1](fname,'wb',level) as f:
+            _dump(data,f,oob)
+    if verbose:
+        print(filesize(fname))
 
 # Cell
-def load(fname='data.gz',delete=False):
+def load(fname='data.gz',delete=False,codec=None,mmap=False):
     '''
     Loads `fname`, returning pickled `data`.
+    The `codec` it was saved with is detected from the file if not given.
+    If `fname` is a container directory, its arrays are memory-mapped if `mmap`
+    (read-only, or with the `np.load` mode given as `mmap`).
     '''
-    with gzip.open(fname, "rb") as f:
-        data=pickle.load(f)
+    if os.path.isdir(fname):
+        data=_load_container(fname,mmap)
+        if delete is True:
+            shutil.rmtree(fname)
+        return data
+    with _codecs[codec or detect_codec(fname)][1](fname,'rb',None) as f:
+        data=_load(f)
     if delete is True:
         os.remove(fname)
     return data
 
+# Cell
+class Writer:
+    '''
+    Appends objects to `fname` as independently compressed pickle chunks, so a file
+    can grow during a run and be read back with `reader` before it is finished.
+    If `index`, the byte offset of each chunk is appended to `fname`+'.idx' for random access.
+    `codec`, `level` and `oob` are as in `save`. Use as a context manager or `close` when done.
+    '''
+    def __init__(self,fname='data.gz',codec='gzip',level=None,oob=False,index=False):
+        self.fname,self.codec,self.level,self.oob=fname,codec,level,oob
+        self.f=open(fname,'ab')
+        self.idx=open(fname+'.idx','a') if index else None
+
+    def write(self,obj):
+        '''
+        Appends `obj` as one chunk.
+        '''
+        if self.idx is not None:
+            self.idx.write(f'{self.f.tell()}\n')
+            self.idx.flush()
+        if self.codec=='pickle':
+            _dump(obj,self.f,self.oob)
+        else:
+            with _codecs[self.codec][1](self.f,'wb',self.level) as c:
+                _dump(obj,c,self.oob)
+        self.f.flush()
+
+    def writemany(self,objs : Iterable):
+        '''
+        Appends each of `objs` as its own chunk.
+        '''
+        for obj in objs:
+            self.write(obj)
+
+    def close(self):
+        self.f.close()
+        if self.idx is not None:
+            self.idx.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self,*exc):
+        self.close()
+
+def reader(fname='data.gz',chunks=None,codec=None):
+    '''
+    Lazily yields the chunks appended to `fname` by `Writer`, in order.
+    If `chunks` (an int or iterable of ints), only yields those chunks,
+    seeking to them with the offsets in `fname`+'.idx'.
+    '''
+    codec=codec or detect_codec(fname)
+    if chunks is None:
+        with _codecs[codec][1](fname,'rb',None) as f:
+            while True:
+                try:
+                    yield _load(f)
+                except EOFError:
+                    return
+    with open(fname+'.idx') as idx:
+        offsets=[int(line) for line in idx]
+    with open(fname,'rb') as f:
+        for n in ([chunks] if isinstance(chunks,int) else chunks):
+            f.seek(offsets[n])
+            if codec=='pickle':
+                yield _load(f)
+            else:
+                with _codecs[codec][1](f,'rb',None) as c:
+                    yield _load(c)
+
+# Cell
+_executors={'thread':ThreadPoolExecutor,'process':ProcessPoolExecutor}
+
+def _pool(func,items,executor='thread',workers=None,ordered=True):
+    '''
+    Yields `func(*item)` for each of `items` computed by an `executor` ('thread', 'process'
+    or an existing `concurrent.futures.Executor`) of `workers`, in order or as completed.
+    '''
+    pool=executor if isinstance(executor,Executor) else _executors[executor](workers)
+    try:
+        futures=[pool.submit(func,*item) for item in items]
+        for future in (futures if ordered else as_completed(futures)):
+            yield future.result()
+    finally:
+        if pool is not executor:
+            pool.shutdown()
+
+def _save_one(fname,data,kwargs):
+    start=time.perf_counter()
+    save(data,fname,verbose=False,**kwargs)
+    return {'fname':fname,'bytes':_nbytes(fname),'seconds':time.perf_counter()-start}
+
+def _load_one(fname,kwargs):
+    start=time.perf_counter()
+    size=_nbytes(fname)
+    data=load(fname,**kwargs)
+    return {'fname':fname,'data':data,'bytes':size,'seconds':time.perf_counter()-start}
+
+def save_many(objs : Mapping,
+              executor : Union[str,Executor] = 'thread',
+              workers : Optional[int] = None,
+              ordered : bool = True,
+              **kwargs) -> Union[list,Iterable[dict]]:
+    '''
+    Saves each of {fname : data} `objs` concurrently with `save(**kwargs)`, using an `executor`
+    ('thread', 'process' or an existing `concurrent.futures.Executor`) of `workers`.
+    Returns a list of {'fname','bytes','seconds'} in the order of `objs`,
+    or if not `ordered`, yields them as each file is completed.
+    '''
+    r=_pool(_save_one,[(fname,data,kwargs) for fname,data in objs.items()],executor,workers,ordered)
+    return list(r) if ordered else r
+
+def load_many(fnames : Union[str,Iterable[str]],
+              executor : Union[str,Executor] = 'thread',
+              workers : Optional[int] = None,
+              ordered : bool = True,
+              **kwargs) -> Union[list,Iterable[dict]]:
+    '''
+    Loads each of `fnames`, or the sorted files matching a glob pattern, concurrently with
+    `load(**kwargs)`, using an `executor` of `workers` as in `save_many`. Returns a list of
+    {'fname','data','bytes','seconds'} in the order of `fnames`, or if not `ordered`, yields them as completed.
+    '''
+    fnames=sorted(glob.glob(fnames)) if isinstance(fnames,str) else fnames
+    r=_pool(_load_one,[(fname,kwargs) for fname in fnames],executor,workers,ordered)
+    return list(r) if ordered else r
+
+# Cell
+def _update(h,obj):
+    '''
+    Feeds `obj` into hash `h` by value, recursing into containers.
+    '''
+    if isinstance(obj,np.ndarray):
+        h.update(f'ndarray{obj.dtype.str}{obj.shape}'.encode())
+        if obj.dtype.hasobject:
+            _update(h,obj.tolist())
+        else:
+            h.update(np.ascontiguousarray(obj).data)
+    elif isinstance(obj,(list,tuple)):
+        h.update(f'{type(obj).__name__}{len(obj)}'.encode())
+        for o in obj:
+            _update(h,o)
+    elif isinstance(obj,dict):
+        h.update(f'dict{len(obj)}'.encode())
+        for _,k,v in sorted((stable_hash(k),k,v) for k,v in obj.items()):
+            _update(h,k)
+            _update(h,v)
+    elif isinstance(obj,(set,frozenset)):
+        h.update(f'set{len(obj)}'.encode())
+        for d in sorted(stable_hash(o) for o in obj):
+            h.update(d.encode())
+    elif obj is None or isinstance(obj,(bool,int,float,complex,str,bytes,np.generic)):
+        h.update(f'{type(obj).__name__}{obj!r}'.encode())
+    else:
+        try:
+            h.update(pickle.dumps(obj,4))
+        except Exception: #e.g. lambdas, only stable within this process
+            h.update(repr(obj).encode())
+
+def stable_hash(obj) -> str:
+    '''
+    Returns a hex digest of `obj` which is the same across processes,
+    hashing arrays by their dtype, shape and buffer, and containers by their elements.
+    '''
+    h=hashlib.blake2b(digest_size=16)
+    _update(h,obj)
+    return h.hexdigest()
+
+def _evict(dir,maxfiles=None,maxbytes=None):
+    '''
+    Removes the least recently used files of `dir` until at most `maxfiles` and `maxbytes` remain.
+    '''
+    files=[os.path.join(dir,f) for f in os.listdir(dir) if not f.endswith('.tmp')]
+    files=sorted((os.stat(f).st_mtime_ns,os.stat(f).st_size,f) for f in files)
+    total=sum(s for _,s,_ in files)
+    count=len(files)
+    for _,size,f in files: #oldest first
+        if (maxfiles is None or count<=maxfiles) and (maxbytes is None or total<=maxbytes):
+            break
+        os.remove(f)
+        count-=1
+        total-=size
+
+def memoize(dir : str = 'memo',
+            codec : str = 'gzip',
+            level : Optional[int] = None,
+            maxfiles : Optional[int] = None,
+            maxbytes : Optional[int] = None,
+            memory : int = 0) -> callable:
+    '''
+    Decorator caching the results of a function on disk in `dir`, using `save` and `load`
+    with `codec` and `level`. Results are keyed by the `stable_hash` of the function's
+    qualified name and arguments, so they are reused by later processes. The least recently
+    used files are removed beyond `maxfiles` or `maxbytes`, and the last `memory` results
+    are also kept in memory (returned as the same objects).
+    '''
+    def decorator(func):
+        name=f'{func.__module__}.{func.__qualname__}'
+        cache=collections.OrderedDict()
+        @wraps(func)
+        def wrapper(*args,**kwargs):
+            key=stable_hash((name,args,kwargs))
+            if key in cache:
+                cache.move_to_end(key)
+                return cache[key]
+            fname=os.path.join(dir,key)
+            if os.path.exists(fname):
+                result=load(fname)
+                os.utime(fname) #mark as recently used
+            else:
+                result=func(*args,**kwargs)
+                os.makedirs(dir,exist_ok=True)
+                tmp=f'{fname}.{os.getpid()}.tmp' #so an interrupted save leaves no partial result
+                save(result,tmp,codec=codec,level=level,verbose=False)
+                os.replace(tmp,fname)
+                if maxfiles is not None or maxbytes is not None:
+                    _evict(dir,maxfiles,maxbytes)
+            if memory:
+                cache[key]=result
+                if len(cache)>memory:
+                    cache.popitem(last=False)
+            return result
+        wrapper.cache=cache
+        return wrapper
+    return decorator
+
 # Cell
 def push(branch='master',comment='auto'):
     "Pushes all current files to given branch with comment."
@@ -94,6 +603,25 @@ def backup(comment='Backup'):
     os.system('git commit -m "{}"'.format(comment)) #commit all files
     os.system('git push -u origin backup --force')
 
+# Internal Cell
+_lazy_modules={'plt':'matplotlib.pyplot','mpl':'matplotlib'} #heavy modules imported on first use
+
+def __getattr__(name):
+    '''
+    Imports the modules of `_lazy_modules` when first accessed, e.g. `sidis.utils.plt`,
+    so that importing `sidis` does not import matplotlib.
+    '''
+    if name in _lazy_modules:
+        globals()[name]=importlib.import_module(_lazy_modules[name])
+        return globals()[name]
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+if sys.version_info<(3,7): #no module `__getattr__` (PEP 562), so look it up from the module's class
+    class _LazyModule(types.ModuleType):
+        def __getattr__(self,name):
+            return __getattr__(name)
+    sys.modules[__name__].__class__=_LazyModule
+
 # Cell
 def fig_params(reset : bool = False,
               X : float = 3.5,
@@ -109,6 +637,7 @@ def fig_params(reset : bool = False,
     '''
     Changes the `rcParams` for plotting, with the option to `reset` to default.
     '''
+    import matplotlib as mpl
     if reset:
         mpl.rcParams.update(mpl.rcParamsDefault)
     else:
@@ -135,7 +664,7 @@ def fig_params(reset : bool = False,
         mpl.rcParams['figure.figsize'] = [X,Y]
         mpl.rcParams['figure.subplot.hspace'] = hspace
 
-def force_aspect(ax : mpl.axes,
+def force_aspect(ax : 'matplotlib.axes.Axes',
                 aspect : int = 1):
     '''
     Forces the aspect of the axes object `ax`.
@@ -151,6 +680,7 @@ def matshow(x : np.ndarray,
     '''
     Simplified image plot of matrix `x` with forced `aspect` that can save `fname` to `path`.
     '''
+    import matplotlib.pyplot as plt
     fig,ax=plt.subplots()
     ax.matshow(x)
     force_aspect(ax,aspect)
@@ -163,24 +693,28 @@ class RNG:
     Globally stable random number generator. Initialized with fixed `seed`.
     Contains `normal`, `random`, and `multimodal` methods, each with an
     `absval` and `asint` argument, which convert to positive values
-    and round to integers respectively.
+    and round to integers respectively. Bounds broadcast like numpy arrays,
+    draws can be written into `out` arrays, and `spawn` creates independent
+    child generators, e.g. one per worker process.
     '''
 
     overloaded = ['random','normal']
 
-    def __init__(self, seed : Optional[int] = None, update = False):
-        self.rng=np.random.default_rng(seed)
+    def __init__(self, seed : Union[None,int,np.random.SeedSequence] = None, update = False):
+        self.seed=seed if isinstance(seed,np.random.SeedSequence) else np.random.SeedSequence(seed)
+        self.rng=np.random.default_rng(self.seed)
         if update:
             self.update()
 
     def typecast(self,
                  y : Union[int,float],
                  absval : bool = False,
-                 asint : bool = False) -> Union[int,float,np.ndarray]:
+                 asint : bool = False,
+                 inplace : bool = False) -> Union[int,float,np.ndarray]:
         if absval:
-            y=abs(y)
+            y=np.abs(y,out=y) if inplace and isinstance(y,np.ndarray) else abs(y)
         if asint:
-            y=np.rint(y).astype(int)
+            y=np.rint(y,out=y) if inplace and isinstance(y,np.ndarray) else np.rint(y).astype(int)
         return y
 
     def normal(self,
@@ -189,38 +723,65 @@ class RNG:
                shape : Optional[tuple] = None,
                absval : bool = False,
                asint : bool = False,
-               clip = None
+               clip = None,
+               out : Optional[np.ndarray] = None
               ) -> Union[int,float,np.ndarray]:
         '''
         Draw from a Gaussian distribution with mean `x` and standard deviation `y`.
         If `shape` is not None, return a numpy array of draws.
+        `x` and `y` broadcast against `shape` as in `np.random.Generator.normal`.
+        If `out`, the draws are written into this float array and it is returned,
+        rounded in place if `asint`.
         '''
-        res = self.rng.normal(loc=x,scale=y,size=shape)
+        if out is None:
+            res = self.rng.normal(loc=x,scale=y,size=shape)
+        else:
+            res = self.rng.standard_normal(out=out,dtype=out.dtype)
+            res *= y
+            res += x
         if clip:
-            res = np.clip(res,*clip)
-        return self.typecast(res,absval=absval,asint=asint)
+            res = np.clip(res,*clip,out=out)
+        return self.typecast(res,absval=absval,asint=asint,inplace=out is not None)
 
     def random(self,
                x : Union[list,float,int] = 0,
                y : Union[list,float,int] = 0,
                shape : Optional[tuple] = None,
                absval : bool = False,
-               asint : bool = False) -> Union[int,float,np.ndarray]:
+               asint : bool = False,
+               out : Optional[np.ndarray] = None) -> Union[int,float,np.ndarray]:
         '''
         Draw from a uniform distribution in the interval [`x`,`y`].
         If `shape` is not None, return a numpy array of draws.
+        Array bounds broadcast together, and each pair of bounds gets
+        its own `shape` of draws, so the result has shape (*bounds, *shape).
+        If `out`, the draws are written into this float array and it is returned,
+        rounded in place if `asint`.
         '''
-        if hasattr(x,'__iter__') and hasattr(y,'__iter__'):
-            res = []
-            for xi,yi in zip(x,y):
-                res += [xi+(yi-xi)*self.rng.random(size=shape)]
-            res = self.typecast(np.array(res),absval=absval,asint=asint)
+        size = shape
+        if np.ndim(x) or np.ndim(y):
+            x,y = np.asarray(x),np.asarray(y)
+            shape = () if shape is None else ((shape,) if isinstance(shape,int) else tuple(shape))
+            size = np.broadcast(x,y).shape+shape
+            x,y = x.reshape(x.shape+(1,)*len(shape)),y.reshape(y.shape+(1,)*len(shape))
+        res = self.rng.random(size=size,out=out,dtype=np.float64 if out is None else out.dtype)
+        if out is None:
+            res = x+(y-x)*res
         else:
-            res = self.typecast(x+(y-x)*self.rng.random(size=shape),
-                                absval=absval,asint=asint)
-        return res
+            res *= y-x
+            res += x
+        return self.typecast(res,absval=absval,asint=asint,inplace=out is not None)
+
+    def spawn(self, n : int) -> list:
+        '''
+        Returns `n` statistically independent child `RNG`s, seeded by spawning
+        the `SeedSequence` of this one. Repeated calls give new children.
+        '''
+        return [RNG(s) for s in self.seed.spawn(n)]
 
     def __getattr__(self,attr):
+        if attr.startswith('__') or attr in ('rng','seed'): #not yet set, e.g. when unpickling
+            raise AttributeError(attr)
         if attr in RNG.overloaded:
             return getattr(self,attr)
         else: